@@ -0,0 +1,207 @@
+import argparse
+import csv
+import random
+import resource
+import tempfile
+import time
+
+import degrees
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark degrees search on a synthetic graph."
+    )
+    parser.add_argument("--people", type=int, default=100000)
+    parser.add_argument("--movies", type=int, default=50000)
+    parser.add_argument("--cast", type=int, default=4,
+                        help="largest number of stars per movie")
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="zipf exponent of how often people are cast, 0 for uniform")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Generating {args.people} people and {args.movies} movies...")
+        generate(directory, args.people, args.movies, args.cast, args.skew, args.seed)
+
+        # Load time
+        reset()
+        start = time.perf_counter()
+        degrees.load_data(directory)
+        report("load csv", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        degrees.build_adjacency()
+        report("build adjacency", time.perf_counter() - start)
+
+        reset()
+        start = time.perf_counter()
+        degrees.load_data(directory, compact=True)
+        report("load compact", time.perf_counter() - start)
+
+        reset()
+        degrees.load_data(directory)
+        degrees.build_adjacency()
+        degrees.save_snapshot(directory)
+        reset()
+        start = time.perf_counter()
+        degrees.load_data(directory, adjacency=True, cache=True)
+        report("load snapshot", time.perf_counter() - start)
+
+        start = time.perf_counter()
+        degrees.build_landmarks()
+        report("build landmarks", time.perf_counter() - start)
+
+        queries = query_mix(args.queries, args.seed)
+
+        # Per query latency and nodes expanded for each search
+        print()
+        print(f"{'search':<16}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+              f"{'max ms':>10}{'expanded':>12}{'found':>8}")
+        searches = [
+            ("bfs", degrees.shortest_path, False),
+            ("bidirectional", degrees.bidirectional_shortest_path, False),
+            ("indexed", degrees.shortest_path, True),
+            ("landmark", degrees.landmark_shortest_path, True)
+        ]
+        for name, search, indexed in searches:
+            latencies, expanded, found = run(search, queries, indexed)
+            print(f"{name:<16}"
+                  f"{percentile(latencies, 50) * 1000:>10.2f}"
+                  f"{percentile(latencies, 90) * 1000:>10.2f}"
+                  f"{percentile(latencies, 99) * 1000:>10.2f}"
+                  f"{max(latencies) * 1000:>10.2f}"
+                  f"{expanded:>12}"
+                  f"{found:>8}")
+
+    # Peak resident memory of the whole run, which ru_maxrss gives in kilobytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print()
+    print(f"peak memory: {peak / 1024:.1f} MB")
+
+
+def generate(directory, people, movies, cast, skew, seed):
+    """
+    Writes synthetic people.csv, movies.csv and stars.csv files to a directory.
+
+    Each movie gets between 1 and cast stars, and the i-th person is
+    cast with weight 1 / i ** skew, so a few people star in many movies.
+    """
+    rng = random.Random(seed)
+
+    with open(f"{directory}/people.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(people):
+            writer.writerow([i, f"Person {i}", rng.randint(1920, 2005)])
+
+    with open(f"{directory}/movies.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(movies):
+            writer.writerow([i, f"Movie {i}", rng.randint(1930, 2024)])
+
+    weights = []
+    total = 0
+    for i in range(people):
+        total += 1 / (i + 1) ** skew
+        weights.append(total)
+    with open(f"{directory}/stars.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for i in range(movies):
+            stars = rng.choices(range(people), cum_weights=weights,
+                                k=rng.randint(1, cast))
+            for person in set(stars):
+                writer.writerow([person, i])
+
+
+def reset():
+    """
+    Clears all data loaded into the degrees module.
+    """
+    for table in [degrees.names, degrees.people, degrees.movies,
+                  degrees.person_index, degrees.movie_index, degrees.adjacency_extra,
+                  degrees.cast_extra, degrees.role_extra, degrees.name_ids,
+                  degrees.name_trigrams]:
+        table.clear()
+    for table in [degrees.person_ids, degrees.movie_ids, degrees.adjacency_offsets,
+                  degrees.adjacency_people, degrees.adjacency_movies,
+                  degrees.person_names, degrees.person_births,
+                  degrees.movie_titles, degrees.movie_years,
+                  degrees.cast_offsets, degrees.cast_people,
+                  degrees.role_offsets, degrees.role_movies,
+                  degrees.landmarks, degrees.landmark_distances,
+                  degrees.indexed_names, degrees.sorted_names]:
+        del table[:]
+
+
+def query_mix(count, seed):
+    """
+    Returns a fixed list of (source, target) pairs of people
+    who have starred in at least one movie.
+    """
+    rng = random.Random(seed)
+    cast = sorted(person_id for person_id, person in degrees.people.items()
+                  if person["movies"])
+    return [(rng.choice(cast), rng.choice(cast)) for _ in range(count)]
+
+
+def run(search, queries, indexed):
+    """
+    Runs a search on every query.
+
+    Returns the latency of each query, the mean number of people expanded
+    per query and the number of queries with a path.
+    """
+    # Searches over the integer index count their own expansions; the others
+    # are counted by wrapping neighbors_for_person for the duration of the run
+    degrees.search_stats["expanded"] = 0
+    expanded = 0
+    neighbors_for_person = degrees.neighbors_for_person
+
+    def counting_neighbors_for_person(person_id):
+        nonlocal expanded
+        expanded += 1
+        return neighbors_for_person(person_id)
+
+    # The dictionary searches only run while the adjacency index is hidden
+    index = degrees.person_ids[:]
+    if not indexed:
+        del degrees.person_ids[:]
+
+    degrees.neighbors_for_person = counting_neighbors_for_person
+    latencies = []
+    found = 0
+    try:
+        for source, target in queries:
+            start = time.perf_counter()
+            path = search(source, target)
+            latencies.append(time.perf_counter() - start)
+            if path is not None:
+                found += 1
+    finally:
+        degrees.neighbors_for_person = neighbors_for_person
+        degrees.person_ids[:] = index
+
+    if indexed:
+        expanded = degrees.search_stats["expanded"]
+    return latencies, round(expanded / len(queries)), found
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of a list of values.
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * p // 100)]
+
+
+def report(label, seconds):
+    print(f"{label:<16}{seconds:>10.2f} s")
+
+
+if __name__ == "__main__":
+    main()
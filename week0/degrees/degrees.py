@@ -1,9 +1,19 @@
+import bisect
 import csv
+import gc
+import heapq
+import os
+import pickle
 import sys
+import tempfile
+from array import array
+from collections import Counter, deque
 
 from util import Node, StackFrontier, QueueFrontier
 
-# Maps names to a set of corresponding person_ids
+# Maps names to a set of corresponding person_ids, or when loaded compactly
+# to the integer index of the person with the name, or a tuple of indexes
+# for names shared by more than one person (see ids_for_name)
 names = {}
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
@@ -12,11 +22,108 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Integer indexes used by the adjacency index, and the IMDB ids they stand for
+person_ids = []
+person_index = {}
+movie_ids = []
+movie_index = {}
 
-def load_data(directory):
+# Co-star adjacency in compressed sparse row form: the co-stars of person i
+# are adjacency_people[adjacency_offsets[i]:adjacency_offsets[i + 1]],
+# each reached through the movie at the same position in adjacency_movies
+adjacency_offsets = array("q")
+adjacency_people = array("i")
+adjacency_movies = array("i")
+
+# Positions of co-stars appended to the end of the adjacency arrays since the
+# index was built, by integer index of the person they belong to. Entries for
+# credits removed since the index was built point back at their own person.
+adjacency_extra = {}
+
+# Columns holding each person's name and birth year, and each movie's title and
+# year, by integer index, when loaded compactly in place of people and movies
+# (unknown years are stored as 0)
+person_names = []
+person_births = array("h")
+movie_titles = []
+movie_years = array("h")
+
+# Stars of each movie and movies of each person by integer index, when loaded
+# compactly, grouped in the same form as the adjacency index (entries for
+# removed credits are marked with -1)
+cast_offsets = array("q")
+cast_people = array("i")
+cast_extra = {}
+role_offsets = array("q")
+role_movies = array("i")
+role_extra = {}
+
+# Integer indexes of the landmark people, and for each landmark an array of
+# its distance to every person by integer index (-1 if not connected)
+landmarks = []
+landmark_distances = []
+
+# How many landmarks, picked per query as the ones that best separate the two
+# people, landmark_shortest_path uses to estimate the distance left
+ACTIVE_LANDMARKS = 4
+
+# Number of people taken off the queue by the searches over the integer index,
+# added up across searches so a benchmark can see how much work they do
+search_stats = {"expanded": 0}
+
+# Index for searching lowercase names by prefix or by fragment: every indexed
+# name by integer id, the ids of the names, the names in sorted order, and for
+# each three-character fragment an array of the ids of names containing it
+indexed_names = []
+name_ids = {}
+sorted_names = []
+name_trigrams = {}
+
+# How many prefix matches, and how many names sharing fragments with the
+# query, search_names considers before ranking
+PREFIX_MATCHES = 100
+FRAGMENT_MATCHES = 50
+
+# Most names a fragment can be in and still be counted by search_names,
+# as fragments shared by that many names say little about a match and
+# counting them is most of the cost of a search
+FRAGMENT_POSTINGS = 5000
+
+# Name of the binary snapshot saved next to the CSV files
+SNAPSHOT = "snapshot.pickle"
+
+# Version of the snapshot layout, changed whenever the layout changes
+# so that snapshots saved in an older layout are treated as stale
+FORMAT = 3
+
+
+def load_data(directory, adjacency=False, cache=False, compact=False):
     """
     Load data from CSV files into memory.
+
+    If adjacency is True, also builds the integer adjacency index
+    used to speed up shortest_path.
+
+    If cache is True, loads from a binary snapshot of the CSV files when
+    one is up to date, and saves a new snapshot otherwise.
+
+    If compact is True, loads into the compact columns and adjacency index
+    instead of the people and movies dictionaries, using far less memory.
     """
+    # Indexes of data loaded before would answer for the wrong graph, and
+    # names loaded now need indexing again before search_names uses them
+    clear_indexes()
+    clear_name_index()
+
+    if cache and load_snapshot(directory, adjacency, compact):
+        return
+
+    if compact:
+        load_compact(directory)
+        if cache:
+            save_snapshot(directory)
+        return
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -51,6 +158,526 @@ def load_data(directory):
             except KeyError:
                 pass
 
+    if adjacency:
+        build_adjacency()
+    if cache:
+        save_snapshot(directory)
+
+
+def load_compact(directory):
+    """
+    Load data from CSV files into the compact columns and adjacency index,
+    streaming rows without building a dictionary for each one.
+    """
+    # Load people
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        id_column, name_column, birth_column = (
+            header.index(column) for column in ["id", "name", "birth"]
+        )
+        for row in reader:
+            person_id = row[id_column]
+            if person_id in person_index:
+                continue
+            person_index[person_id] = len(person_ids)
+            person_ids.append(person_id)
+            person_names.append(row[name_column])
+            person_births.append(parse_year(row[birth_column]))
+            add_name(row[name_column].lower(), person_id)
+
+    # Load movies
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        id_column, title_column, year_column = (
+            header.index(column) for column in ["id", "title", "year"]
+        )
+        for row in reader:
+            movie_id = row[id_column]
+            if movie_id in movie_index:
+                continue
+            movie_index[movie_id] = len(movie_ids)
+            movie_ids.append(movie_id)
+            movie_titles.append(row[title_column])
+            movie_years.append(parse_year(row[year_column]))
+
+    # Load stars as two parallel columns of integer indexes
+    star_people = array("i")
+    star_movies = array("i")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        person_column, movie_column = (
+            header.index(column) for column in ["person_id", "movie_id"]
+        )
+        for row in reader:
+            person = person_index.get(row[person_column])
+            movie = movie_index.get(row[movie_column])
+            if person is not None and movie is not None:
+                star_people.append(person)
+                star_movies.append(movie)
+
+    # Group stars by movie and movies by person, then join them into co-stars
+    cast_offsets[:], cast_people[:] = group(star_movies, star_people, len(movie_ids))
+    role_offsets[:], role_movies[:] = group(star_people, star_movies, len(person_ids))
+    del star_people, star_movies
+
+    offsets = array("q", [0])
+    neighbors = array("i")
+    through = array("i")
+    for person in range(len(person_ids)):
+        for r in range(role_offsets[person], role_offsets[person + 1]):
+            movie = role_movies[r]
+            for c in range(cast_offsets[movie], cast_offsets[movie + 1]):
+                if cast_people[c] != person:
+                    neighbors.append(cast_people[c])
+                    through.append(movie)
+        offsets.append(len(neighbors))
+
+    adjacency_offsets[:] = offsets
+    adjacency_people[:] = neighbors
+    adjacency_movies[:] = through
+
+
+def parse_year(year):
+    """
+    Returns a year from a CSV field as an integer, or 0 if it is unknown.
+    """
+    return int(year) if year.isdigit() else 0
+
+
+def group(keys, values, count):
+    """
+    Groups values by their integer keys, which range from 0 to count - 1.
+
+    Returns an array of offsets and an array of the grouped values, where
+    the values for key i are values[offsets[i]:offsets[i + 1]].
+    """
+    offsets = array("q", [0]) * (count + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+
+    grouped = array("i", [0]) * len(values)
+    position = offsets[:-1]
+    for key, value in zip(keys, values):
+        grouped[position[key]] = value
+        position[key] += 1
+    return offsets, grouped
+
+
+def snapshot_key(directory):
+    """
+    Returns the size and modification time of each CSV file,
+    which identify the version of the data a snapshot was made from.
+    """
+    key = []
+    for filename in ["people.csv", "movies.csv", "stars.csv"]:
+        stat = os.stat(f"{directory}/{filename}")
+        key.append((filename, stat.st_size, stat.st_mtime_ns))
+    return key
+
+
+def load_snapshot(directory, adjacency=False, compact=False):
+    """
+    Loads data from the snapshot in a directory.
+
+    Returns True if the snapshot was loaded, or False if it is
+    missing, unreadable, older than the CSV files or saved from
+    a different kind of load.
+    """
+    try:
+        # Unpickling creates millions of objects, none of them garbage
+        gc.disable()
+        try:
+            with open(f"{directory}/{SNAPSHOT}", "rb") as f:
+                snapshot = pickle.load(f)
+        finally:
+            gc.enable()
+        if snapshot["format"] != FORMAT:
+            return False
+        if snapshot["key"] != snapshot_key(directory):
+            return False
+        if (snapshot["compact"] is not None) != compact:
+            return False
+
+        # Check the whole snapshot before loading any of it, so a rejected
+        # snapshot leaves nothing behind for the CSV files to be loaded on top of
+        if not all(isinstance(snapshot[table], dict)
+                   for table in ["names", "people", "movies"]):
+            return False
+        if compact and len(snapshot["compact"]) != 10:
+            return False
+        if snapshot["adjacency"] is not None and len(snapshot["adjacency"]) != 6:
+            return False
+
+    # A damaged snapshot, or one saved by other code, is as good as missing
+    except (OSError, EOFError, pickle.UnpicklingError,
+            KeyError, ValueError, AttributeError, TypeError):
+        return False
+
+    names.update(snapshot["names"])
+    people.update(snapshot["people"])
+    movies.update(snapshot["movies"])
+    if compact:
+        (person_names[:], person_births[:], movie_titles[:], movie_years[:],
+         cast_offsets[:], cast_people[:], cast_extras,
+         role_offsets[:], role_movies[:], role_extras) = snapshot["compact"]
+        cast_extra.update(cast_extras)
+        role_extra.update(role_extras)
+
+    if adjacency or compact:
+        if snapshot["adjacency"] is None:
+            # Build the index now and keep it for next time
+            build_adjacency()
+            save_snapshot(directory)
+        else:
+            (person_ids[:], movie_ids[:], adjacency_offsets[:],
+             adjacency_people[:], adjacency_movies[:], extras) = snapshot["adjacency"]
+            adjacency_extra.update(extras)
+            person_index.update((person_id, i) for i, person_id in enumerate(person_ids))
+            movie_index.update((movie_id, i) for i, movie_id in enumerate(movie_ids))
+    return True
+
+
+def save_snapshot(directory):
+    """
+    Saves the loaded data, and the adjacency index if built,
+    to a snapshot in a directory.
+    """
+    adjacency = None
+    if person_ids:
+        adjacency = (person_ids, movie_ids, adjacency_offsets,
+                     adjacency_people, adjacency_movies, adjacency_extra)
+    compact = None
+    if person_names:
+        compact = (person_names, person_births, movie_titles, movie_years,
+                   cast_offsets, cast_people, cast_extra,
+                   role_offsets, role_movies, role_extra)
+    snapshot = {
+        "format": FORMAT,
+        "key": snapshot_key(directory),
+        "compact": compact,
+        "names": names,
+        "people": people,
+        "movies": movies,
+        "adjacency": adjacency
+    }
+
+    # Write to a uniquely named temporary file first, so readers never see a
+    # partial snapshot and processes saving at the same time don't clash
+    path = f"{directory}/{SNAPSHOT}"
+    temporary = None
+    try:
+        with tempfile.NamedTemporaryFile(dir=directory, prefix=f"{SNAPSHOT}.",
+                                         delete=False) as f:
+            temporary = f.name
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    # The snapshot is only a cache, so the data stays loaded without it
+    except OSError:
+        if temporary is not None:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+
+def build_adjacency():
+    """
+    Builds the integer adjacency index from the loaded people and movies.
+    """
+    person_ids[:] = people
+    person_index.clear()
+    person_index.update((person_id, i) for i, person_id in enumerate(person_ids))
+    movie_ids[:] = movies
+    movie_index.clear()
+    movie_index.update((movie_id, i) for i, movie_id in enumerate(movie_ids))
+
+    offsets = array("q", [0])
+    neighbors = array("i")
+    through = array("i")
+    for person_id in person_ids:
+        for movie_id in people[person_id]["movies"]:
+            m = movie_index[movie_id]
+            for star_id in movies[movie_id]["stars"]:
+                if star_id != person_id:
+                    neighbors.append(person_index[star_id])
+                    through.append(m)
+        offsets.append(len(neighbors))
+
+    # Replace the contents in place so imported references stay valid
+    adjacency_offsets[:] = offsets
+    adjacency_people[:] = neighbors
+    adjacency_movies[:] = through
+    adjacency_extra.clear()
+
+
+def clear_indexes():
+    """
+    Empties the adjacency index, the landmarks and the compact columns,
+    which only describe the data they were built from.
+    """
+    for table in [person_ids, movie_ids, adjacency_offsets, adjacency_people,
+                  adjacency_movies, landmarks, landmark_distances,
+                  person_names, person_births, movie_titles, movie_years,
+                  cast_offsets, cast_people, role_offsets, role_movies]:
+        del table[:]
+    for table in [person_index, movie_index, adjacency_extra, cast_extra, role_extra]:
+        table.clear()
+
+
+def adjacency_range(person):
+    """
+    Returns the positions of a person's co-stars in the adjacency arrays.
+    """
+    return group_range(adjacency_offsets, adjacency_extra, person)
+
+
+def group_range(offsets, extra, key):
+    """
+    Returns the positions of the values for a key in a grouped index,
+    including any appended since it was built.
+    """
+    positions = range(offsets[key], offsets[key + 1])
+    if key in extra:
+        return [*positions, *extra[key]]
+    return positions
+
+
+def build_landmarks(count=16):
+    """
+    Chooses the count best connected people as landmarks and finds
+    their distance to everyone, using the adjacency index.
+    """
+    if not person_ids:
+        raise Exception("adjacency index not built")
+
+    # Count co-stars appended since the index was built, but not removed
+    # ones, which point back at their own person
+    degree = [sum(1 for k in adjacency_range(i) if adjacency_people[k] != i)
+              for i in range(len(person_ids))]
+    chosen = heapq.nlargest(count, range(len(person_ids)), key=degree.__getitem__)
+
+    distances = []
+    for landmark in chosen:
+        distance = array("h", [-1]) * len(person_ids)
+        distance[landmark] = 0
+        queue = deque([landmark])
+        while queue:
+            person = queue.popleft()
+            for k in adjacency_range(person):
+                neighbor = adjacency_people[k]
+                if distance[neighbor] == -1:
+                    distance[neighbor] = distance[person] + 1
+                    queue.append(neighbor)
+        distances.append(distance)
+
+    landmarks[:] = chosen
+    landmark_distances[:] = distances
+
+
+def distance_bounds(source, target):
+    """
+    Returns a (lower, upper) pair of bounds on the degrees of separation
+    between the source and the target, from their distances to the landmarks.
+    The upper bound is None if no landmark is connected to both.
+
+    If the landmarks show the two are not connected, returns None.
+    """
+    if source == target:
+        return (0, 0)
+    start = person_index[source]
+    goal = person_index[target]
+
+    lower = 1
+    upper = None
+    for distance in landmark_distances:
+        to_start = distance[start]
+        to_goal = distance[goal]
+
+        # A landmark connected to exactly one of them separates them
+        if (to_start == -1) != (to_goal == -1):
+            return None
+        if to_start == -1:
+            continue
+
+        # Triangle inequality through the landmark
+        lower = max(lower, abs(to_start - to_goal))
+        if upper is None or to_start + to_goal < upper:
+            upper = to_start + to_goal
+    return (lower, upper)
+
+
+def landmark_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using the landmark
+    distances to answer straight away where they pin the separation
+    down, and otherwise to narrow a bidirectional search.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+    bounds = distance_bounds(source, target)
+    if bounds is None:
+        return None
+    start = person_index[source]
+    goal = person_index[target]
+
+    # When the bounds meet, the path through a landmark is a shortest path
+    lower, upper = bounds
+    if lower == upper:
+        for distance in landmark_distances:
+            if distance[start] != -1 and distance[start] + distance[goal] == upper:
+                return landmark_path(start, goal, distance)
+
+    # The landmarks that best separate the two give the best estimates, so
+    # only the few of them best for this query are used
+    active = heapq.nlargest(
+        ACTIVE_LANDMARKS,
+        (distance for distance in landmark_distances if distance[goal] != -1),
+        key=lambda distance: abs(distance[start] - distance[goal])
+    )
+
+    # Search outwards from both people a layer at a time, as
+    # bidirectional_shortest_path does but over the integer index. For each
+    # reached person, their distance from that side's end, and the person
+    # and adjacency entry they were reached from
+    forward = array("h", [-1]) * len(person_ids)
+    forward_parent = array("i", [-1]) * len(person_ids)
+    forward_via = array("q", [-1]) * len(person_ids)
+    backward = array("h", [-1]) * len(person_ids)
+    backward_parent = array("i", [-1]) * len(person_ids)
+    backward_via = array("q", [-1]) * len(person_ids)
+    forward[start] = backward[goal] = 0
+
+    # Each side estimates the distance left to the other end
+    to_goal = [distance[goal] for distance in active]
+    to_start = [distance[start] for distance in active]
+
+    forward_layer = [start]
+    backward_layer = [goal]
+    expanded = 0
+    while forward_layer and backward_layer:
+
+        # Always grow the smaller side, since it has fewer people to expand
+        if len(forward_layer) <= len(backward_layer):
+            expanded += len(forward_layer)
+            forward_layer, meeting = expand_indexed_layer(
+                forward_layer, (forward, forward_parent, forward_via), backward,
+                active, to_goal, upper
+            )
+        else:
+            expanded += len(backward_layer)
+            backward_layer, meeting = expand_indexed_layer(
+                backward_layer, (backward, backward_parent, backward_via), forward,
+                active, to_start, upper
+            )
+
+        if meeting != -1:
+            search_stats["expanded"] += expanded
+
+            # Follow parents back to the source, then on to the target
+            path = []
+            person = meeting
+            while person != start:
+                path.append((movie_ids[adjacency_movies[forward_via[person]]],
+                             person_ids[person]))
+                person = forward_parent[person]
+            path.reverse()
+            person = meeting
+            while person != goal:
+                k = backward_via[person]
+                person = backward_parent[person]
+                path.append((movie_ids[adjacency_movies[k]], person_ids[person]))
+            return path
+
+    search_stats["expanded"] += expanded
+    return None
+
+
+def expand_indexed_layer(layer, side, other_depth, active, to_end, upper):
+    """
+    Reaches everyone next to a layer of a bidirectional search over the
+    integer index, leaving out anyone the active landmarks show cannot be
+    on a path between the two ends no longer than upper. Side holds the
+    depth, parent and via arrays of the side being grown.
+
+    Returns the new layer, and the person where the two sides meet along
+    the shortest path, or -1 if they haven't met yet.
+    """
+    depth, parent, via = side
+    steps = depth[layer[0]] + 1
+    count = len(active)
+
+    next_layer = []
+    meeting = -1
+    shortest = None
+    for person in layer:
+        for k in adjacency_range(person):
+            neighbor = adjacency_people[k]
+            if depth[neighbor] != -1:
+                continue
+
+            # Lower bound on the distance left to the other end, from the
+            # triangle inequality through each landmark
+            if upper is not None:
+                estimate = 0
+                for i in range(count):
+                    gap = active[i][neighbor] - to_end[i]
+                    if gap < 0:
+                        gap = -gap
+                    if gap > estimate:
+                        estimate = gap
+                if steps + estimate > upper:
+                    continue
+
+            depth[neighbor] = steps
+            parent[neighbor] = person
+            via[neighbor] = k
+            next_layer.append(neighbor)
+
+            # Finish the layer, since a later meeting may be shorter
+            if other_depth[neighbor] != -1:
+                length = steps + other_depth[neighbor]
+                if shortest is None or length < shortest:
+                    shortest = length
+                    meeting = neighbor
+    return next_layer, meeting
+
+
+def landmark_path(start, goal, distance):
+    """
+    Returns the list of (movie_id, person_id) pairs for a path between
+    two people by integer index through the landmark that distance
+    holds the distances to, stepping closer to it at every move.
+    """
+    def towards_landmark(person):
+        steps = []
+        while distance[person]:
+            for k in adjacency_range(person):
+                neighbor = adjacency_people[k]
+                if distance[neighbor] == distance[person] - 1:
+                    steps.append((k, neighbor))
+                    person = neighbor
+                    break
+        return steps
+
+    # Walk from the source to the landmark, then back out to the target
+    path = [(movie_ids[adjacency_movies[k]], person_ids[neighbor])
+            for k, neighbor in towards_landmark(start)]
+    backward = towards_landmark(goal)
+    people_back = [goal] + [neighbor for _, neighbor in backward]
+    for i in range(len(backward) - 1, -1, -1):
+        k = backward[i][0]
+        path.append((movie_ids[adjacency_movies[k]], person_ids[people_back[i]]))
+    return path
+
 
 def main():
     if len(sys.argv) > 2:
@@ -59,7 +686,7 @@ def main():
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, cache=True)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -78,9 +705,9 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_name(path[i][1])
+            person2 = person_name(path[i + 1][1])
+            movie = movie_title(path[i + 1][0])
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
@@ -91,6 +718,10 @@ def shortest_path(source, target):
 
     If no possible path, returns None.
     """
+    # Search the adjacency index instead if it has been built
+    if person_ids:
+        return indexed_shortest_path(source, target)
+
     # Initialize the frontier with the starting position
     start = Node(state=source, parent=None, action=None)
     frontier = QueueFrontier()
@@ -138,20 +769,270 @@ def shortest_path(source, target):
     return None
 
 
+def indexed_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using the adjacency index.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+    start = person_index[source]
+    goal = person_index[target]
+
+    # For each reached person, the person and adjacency entry they were reached from
+    parent = array("i", [-1]) * len(person_ids)
+    via = array("q", [-1]) * len(person_ids)
+    parent[start] = start
+
+    queue = deque([start])
+    expanded = 0
+    while queue:
+        person = queue.popleft()
+        expanded += 1
+        for k in adjacency_range(person):
+            neighbor = adjacency_people[k]
+            if parent[neighbor] != -1:
+                continue
+            parent[neighbor] = person
+            via[neighbor] = k
+
+            if neighbor == goal:
+                search_stats["expanded"] += expanded
+
+                # Reconstruct the path by following parents back to the source
+                path = []
+                while neighbor != start:
+                    movie = adjacency_movies[via[neighbor]]
+                    path.append((movie_ids[movie], person_ids[neighbor]))
+                    neighbor = parent[neighbor]
+                path.reverse()
+                return path
+
+            queue.append(neighbor)
+
+    search_stats["expanded"] += expanded
+    return None
+
+
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching outwards
+    from both people at once and meeting in the middle.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached person to the (movie_id, person_id) step that
+    # leads back towards the source (forward) or the target (backward)
+    forward = {source: None}
+    backward = {target: None}
+
+    # The most recently reached layer on each side
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Always grow the smaller side, since it has fewer people to expand
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(forward_layer, forward, backward)
+        else:
+            backward_layer, meeting = expand_layer(backward_layer, backward, forward)
+
+        if meeting is not None:
+            return join_paths(meeting, forward, backward)
+
+    # One side ran out of people to expand, so no path exists
+    return None
+
+
+def expand_layer(layer, parents, other_parents):
+    """
+    Expands every person in a layer of one side of a bidirectional search,
+    recording parents for newly reached people.
+
+    Returns the next layer and the person where the two sides meet
+    on a shortest path, or None if they have not met yet.
+    """
+    next_layer = []
+    meeting = None
+    meeting_length = None
+
+    for person_id in layer:
+        for movie_id, neighbor_id in neighbors_for_person(person_id):
+            if neighbor_id in parents:
+                continue
+            parents[neighbor_id] = (movie_id, person_id)
+            next_layer.append(neighbor_id)
+
+            # Every meeting point in this layer is equally far from this side,
+            # so keep the one that is closest to the other side
+            if neighbor_id in other_parents:
+                length = path_length(neighbor_id, other_parents)
+                if meeting is None or length < meeting_length:
+                    meeting = neighbor_id
+                    meeting_length = length
+
+    return next_layer, meeting
+
+
+def path_length(person_id, parents):
+    """
+    Returns the number of steps from a person back to the root of a search.
+    """
+    length = 0
+    while parents[person_id] is not None:
+        person_id = parents[person_id][1]
+        length += 1
+    return length
+
+
+def join_paths(meeting, forward, backward):
+    """
+    Joins the two halves of a bidirectional search that meet at a person
+    into a single list of (movie_id, person_id) pairs.
+    """
+    # Walk back from the meeting point to the source
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent_id = forward[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    path.reverse()
+
+    # Walk on from the meeting point to the target
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, next_id = backward[person_id]
+        path.append((movie_id, next_id))
+        person_id = next_id
+
+    return path
+
+
+def batch_shortest_paths(pairs):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs for each
+    (source, target) pair, in the same order as the pairs.
+
+    Pairs that share a source are answered from a single search.
+    """
+    # Group the pairs by source
+    groups = {}
+    for i, (source, target) in enumerate(pairs):
+        groups.setdefault(source, []).append(i)
+
+    paths = [None] * len(pairs)
+    for source, indices in groups.items():
+
+        # A lone target is found faster by a search that stops when it is reached
+        if len(indices) == 1:
+            paths[indices[0]] = shortest_path(source, pairs[indices[0]][1])
+            continue
+
+        tree = bfs_tree(source)
+        for i in indices:
+            paths[i] = path_from_tree(tree, pairs[i][1])
+    return paths
+
+
+def degrees_from(source):
+    """
+    Returns a dictionary mapping every person connected to the source
+    to their degrees of separation from the source.
+    """
+    distances = {}
+    for person_id, step in bfs_tree(source).items():
+        # People are reached in order, so each parent already has a distance
+        distances[person_id] = 0 if step is None else distances[step[1]] + 1
+    return distances
+
+
+def bfs_tree(source):
+    """
+    Returns a breadth-first search tree of everyone connected to the source,
+    as a dictionary mapping each person_id to the (movie_id, person_id) step
+    leading back towards the source, or None for the source itself.
+    """
+    if person_ids:
+        return indexed_bfs_tree(source)
+
+    tree = {source: None}
+    layer = [source]
+    while layer:
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor_id in neighbors_for_person(person_id):
+                if neighbor_id not in tree:
+                    tree[neighbor_id] = (movie_id, person_id)
+                    next_layer.append(neighbor_id)
+        layer = next_layer
+    return tree
+
+
+def indexed_bfs_tree(source):
+    """
+    Returns the same tree as bfs_tree, searching the adjacency index.
+    """
+    start = person_index[source]
+    parent = array("i", [-1]) * len(person_ids)
+    via = array("q", [-1]) * len(person_ids)
+    parent[start] = start
+
+    # The queue doubles as the order in which people were reached
+    reached = [start]
+    for person in reached:
+        for k in adjacency_range(person):
+            neighbor = adjacency_people[k]
+            if parent[neighbor] == -1:
+                parent[neighbor] = person
+                via[neighbor] = k
+                reached.append(neighbor)
+
+    tree = {source: None}
+    for person in reached[1:]:
+        movie = adjacency_movies[via[person]]
+        tree[person_ids[person]] = (movie_ids[movie], person_ids[parent[person]])
+    return tree
+
+
+def path_from_tree(tree, target):
+    """
+    Returns the list of (movie_id, person_id) pairs that connect
+    the root of a search tree to the target.
+
+    If the target is not in the tree, returns None.
+    """
+    if target not in tree:
+        return None
+    path = []
+    while tree[target] is not None:
+        movie_id, parent_id = tree[target]
+        path.append((movie_id, target))
+        target = parent_id
+    path.reverse()
+    return path
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = ids_for_name(name.lower())
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
-            name = person["name"]
-            birth = person["birth"]
+            name = person_name(person_id)
+            birth = person_birth(person_id)
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
         try:
             person_id = input("Intended Person ID: ")
@@ -164,18 +1045,441 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def ids_for_name(name):
+    """
+    Returns a list of the person_ids of everyone with a lowercase name.
+    """
+    entry = names.get(name)
+    if entry is None:
+        return []
+    if isinstance(entry, int):
+        return [person_ids[entry]]
+    if isinstance(entry, tuple):
+        return [person_ids[person] for person in entry]
+    return list(entry)
+
+
+def add_name(name, person_id):
+    """
+    Records that a person has a lowercase name.
+    """
+    if not person_names:
+        names.setdefault(name, set()).add(person_id)
+        return
+
+    # Compactly, most names belong to one person and are stored as a bare index
+    person = person_index[person_id]
+    entry = names.get(name)
+    if entry is None:
+        names[name] = person
+    elif isinstance(entry, int):
+        if entry != person:
+            names[name] = (entry, person)
+    elif person not in entry:
+        names[name] = entry + (person,)
+
+
+def remove_name(name, person_id):
+    """
+    Records that a person no longer has a lowercase name.
+    """
+    entry = names.get(name)
+    if entry is None:
+        return
+    if isinstance(entry, set):
+        entry.discard(person_id)
+        if not entry:
+            del names[name]
+        return
+
+    person = person_index[person_id]
+    if entry == person:
+        del names[name]
+    elif isinstance(entry, tuple) and person in entry:
+        rest = tuple(other for other in entry if other != person)
+        names[name] = rest[0] if len(rest) == 1 else rest
+
+
+def build_name_index():
+    """
+    Builds the index used by search_names over all loaded names.
+    """
+    clear_name_index()
+    for name in names:
+        index_name(name)
+    sorted_names[:] = sorted(names)
+
+
+def clear_name_index():
+    """
+    Empties the name index, so search_names builds it again when next used.
+    """
+    del indexed_names[:]
+    name_ids.clear()
+    sorted_names.clear()
+    name_trigrams.clear()
+
+
+def index_name(name):
+    """
+    Adds a lowercase name to the name index, if not already indexed.
+    """
+    if name in name_ids:
+        return
+    name_id = len(indexed_names)
+    name_ids[name] = name_id
+    indexed_names.append(name)
+    for trigram in trigrams(name):
+        if trigram not in name_trigrams:
+            name_trigrams[trigram] = array("i")
+        name_trigrams[trigram].append(name_id)
+
+
+def trigrams(text):
+    """
+    Returns the set of three-character fragments of a text, padded
+    so that fragments at the start of the text are counted too.
+    """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def search_names(query, limit=10):
+    """
+    Returns up to limit person_ids whose names best match a query,
+    without asking for input.
+
+    Exact matches rank first, then names starting with the query (shortest
+    first), then, unless the query is a name itself, names sharing the
+    most fragments with the query.
+    People with the same rank are ordered by birth year.
+
+    Builds the name index first if it hasn't been built since data was loaded.
+    """
+    query = query.strip().lower()
+    if not query:
+        return []
+    if names and not indexed_names:
+        build_name_index()
+
+    # Maps each matching name to its rank, where lower is better
+    ranks = {}
+    if query in names:
+        ranks[query] = (0, 0)
+
+    # Names starting with the query sit together in sorted order
+    i = bisect.bisect_left(sorted_names, query)
+    end = min(len(sorted_names), i + PREFIX_MATCHES)
+    while i < end and sorted_names[i].startswith(query):
+        name = sorted_names[i]
+        if name in names and name not in ranks:
+            ranks[name] = (1, len(name))
+        i += 1
+
+    # Fall back to fragments for misspelled or partial names, unless the
+    # query is a name already, when counting fragments would cost far more
+    # than the lookup and only add worse matches below it
+    if query not in names and len(ranks) < limit:
+        query_trigrams = trigrams(query)
+
+        # Only the rarest fragments are counted, as common ones match everyone
+        postings = sorted(
+            (name_trigrams[trigram] for trigram in query_trigrams
+             if trigram in name_trigrams),
+            key=len
+        )
+        counted = [posting for posting in postings[:max(1, len(postings) // 2)]
+                   if len(posting) <= FRAGMENT_POSTINGS]
+
+        # If every fragment is common, count part of the rarest one
+        if not counted and postings:
+            counted = [postings[0][:FRAGMENT_POSTINGS]]
+        counts = Counter()
+        for posting in counted:
+            counts.update(posting)
+
+        for name_id, _ in counts.most_common(FRAGMENT_MATCHES):
+            name = indexed_names[name_id]
+            if name not in names or name in ranks:
+                continue
+            fragments = trigrams(name)
+            similarity = (len(query_trigrams & fragments)
+                          / len(query_trigrams | fragments))
+            if similarity >= 0.3:
+                ranks[name] = (2, -similarity)
+
+    # Rank the people with the best matching names, stopping once
+    # there are enough that no one with a worse name could place
+    candidates = []
+    for name in sorted(ranks, key=ranks.get):
+        if len(candidates) >= limit and candidates[-1][0] != ranks[name]:
+            break
+        for person_id in ids_for_name(name):
+            birth = person_birth(person_id)
+            born = (0, int(birth)) if birth.isdigit() else (1, 0)
+            candidates.append((ranks[name], born, person_id))
+    candidates.sort()
+    return [person_id for _, _, person_id in candidates[:limit]]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
+    # Compactly loaded people are only in the adjacency index
+    if person_id not in people:
+        person = person_index[person_id]
+        return {
+            (movie_ids[adjacency_movies[k]], person_ids[adjacency_people[k]])
+            for k in adjacency_range(person)
+        }
+
     neighbors = set()
-    for movie_id in movie_ids:
+    for movie_id in people[person_id]["movies"]:
         for person_id in movies[movie_id]["stars"]:
             neighbors.add((movie_id, person_id))
     return neighbors
 
 
+def person_name(person_id):
+    """
+    Returns the name of a person, however they were loaded.
+    """
+    if person_id in people:
+        return people[person_id]["name"]
+    return person_names[person_index[person_id]]
+
+
+def person_birth(person_id):
+    """
+    Returns the birth year of a person as a string, however they were loaded.
+    """
+    if person_id in people:
+        return people[person_id]["birth"]
+    birth = person_births[person_index[person_id]]
+    return str(birth) if birth else ""
+
+
+def movie_title(movie_id):
+    """
+    Returns the title of a movie, however it was loaded.
+    """
+    if movie_id in movies:
+        return movies[movie_id]["title"]
+    return movie_titles[movie_index[movie_id]]
+
+
+def add_person(person_id, name, birth=""):
+    """
+    Adds a person with no movies to the loaded data and any indexes.
+    """
+    if person_id in people or person_id in person_index:
+        raise Exception(f"person {person_id} already loaded")
+
+    if person_names:
+        person_names.append(name)
+        person_births.append(parse_year(str(birth)))
+        role_offsets.append(role_offsets[-1])
+    else:
+        people[person_id] = {"name": name, "birth": str(birth), "movies": set()}
+
+    # Give the person an empty range at the end of the adjacency index
+    if person_ids:
+        person_index[person_id] = len(person_ids)
+        person_ids.append(person_id)
+        adjacency_offsets.append(adjacency_offsets[-1])
+        for distance in landmark_distances:
+            distance.append(-1)
+
+    # Compactly, names refer to the integer index given above
+    add_name(name.lower(), person_id)
+    if indexed_names and name.lower() not in name_ids:
+        index_name(name.lower())
+        bisect.insort(sorted_names, name.lower())
+
+
+def add_movie(movie_id, title, year=""):
+    """
+    Adds a movie with no stars to the loaded data and any indexes.
+    """
+    if movie_id in movies or movie_id in movie_index:
+        raise Exception(f"movie {movie_id} already loaded")
+
+    if person_names:
+        movie_titles.append(title)
+        movie_years.append(parse_year(str(year)))
+        cast_offsets.append(cast_offsets[-1])
+    else:
+        movies[movie_id] = {"title": title, "year": str(year), "stars": set()}
+
+    if person_ids:
+        movie_index[movie_id] = len(movie_ids)
+        movie_ids.append(movie_id)
+
+
+def add_star(person_id, movie_id):
+    """
+    Adds a credit for a person starring in a movie to the loaded data
+    and any indexes.
+    """
+    cast = stars_of(movie_id)
+    if person_id in cast:
+        return
+    if not person_names:
+        people[person_id]["movies"].add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
+
+    if person_ids:
+        person = person_index[person_id]
+        movie = movie_index[movie_id]
+        if person_names:
+            append_to_group(cast_people, cast_extra, movie, person)
+            append_to_group(role_movies, role_extra, person, movie)
+
+        # Link the person and each existing star both ways through the movie
+        for star_id in cast:
+            star = person_index[star_id]
+            append_to_group(adjacency_people, adjacency_extra, person, star)
+            adjacency_movies.append(movie)
+            append_to_group(adjacency_people, adjacency_extra, star, person)
+            adjacency_movies.append(movie)
+
+            # New links can only bring people closer to a landmark
+            for distance in landmark_distances:
+                shorten_distances(distance, person, star)
+                shorten_distances(distance, star, person)
+
+
+def remove_star(person_id, movie_id):
+    """
+    Removes a credit for a person starring in a movie from the loaded data
+    and any indexes.
+    """
+    cast = stars_of(movie_id)
+    if person_id not in cast:
+        return
+    cast.remove(person_id)
+    if not person_names:
+        people[person_id]["movies"].remove(movie_id)
+        movies[movie_id]["stars"].remove(person_id)
+
+    if person_ids:
+        person = person_index[person_id]
+        movie = movie_index[movie_id]
+        if person_names:
+            remove_from_group(cast_offsets, cast_people, cast_extra, movie, person)
+            remove_from_group(role_offsets, role_movies, role_extra, person, movie)
+
+        # Point the links between the person and the rest of the cast
+        # back at their own person, which searches already skip
+        for star_id in cast:
+            star = person_index[star_id]
+            for k in adjacency_range(person):
+                if adjacency_people[k] == star and adjacency_movies[k] == movie:
+                    adjacency_people[k] = person
+            for k in adjacency_range(star):
+                if adjacency_people[k] == person and adjacency_movies[k] == movie:
+                    adjacency_people[k] = star
+
+        # Removed links can move people further from a landmark, which cannot be
+        # tracked cheaply, so the landmarks are dropped until rebuilt
+        if cast:
+            del landmarks[:]
+            del landmark_distances[:]
+
+
+def remove_person(person_id):
+    """
+    Removes a person and all their credits from the loaded data and any indexes.
+    """
+    for movie_id in movies_of(person_id):
+        remove_star(person_id, movie_id)
+
+    remove_name(person_name(person_id).lower(), person_id)
+
+    # The person's integer index is left unused
+    people.pop(person_id, None)
+    person_index.pop(person_id, None)
+
+
+def remove_movie(movie_id):
+    """
+    Removes a movie and all its credits from the loaded data and any indexes.
+    """
+    for person_id in stars_of(movie_id):
+        remove_star(person_id, movie_id)
+
+    # The movie's integer index is left unused
+    movies.pop(movie_id, None)
+    movie_index.pop(movie_id, None)
+
+
+def stars_of(movie_id):
+    """
+    Returns a new set of the person_ids of the stars of a movie.
+    """
+    if movie_id in movies:
+        return set(movies[movie_id]["stars"])
+    movie = movie_index[movie_id]
+    return {
+        person_ids[cast_people[c]]
+        for c in group_range(cast_offsets, cast_extra, movie)
+        if cast_people[c] != -1
+    }
+
+
+def movies_of(person_id):
+    """
+    Returns a new set of the movie_ids of the movies a person starred in.
+    """
+    if person_id in people:
+        return set(people[person_id]["movies"])
+    person = person_index[person_id]
+    return {
+        movie_ids[role_movies[r]]
+        for r in group_range(role_offsets, role_extra, person)
+        if role_movies[r] != -1
+    }
+
+
+def append_to_group(values, extra, key, value):
+    """
+    Appends a value for a key to the end of a grouped index.
+    """
+    values.append(value)
+    extra.setdefault(key, []).append(len(values) - 1)
+
+
+def remove_from_group(offsets, values, extra, key, value):
+    """
+    Marks a value for a key in a grouped index as removed.
+    """
+    for position in group_range(offsets, extra, key):
+        if values[position] == value:
+            values[position] = -1
+
+
+def shorten_distances(distance, person, neighbor):
+    """
+    Updates a landmark's distances after a person gains a new co-star,
+    spreading any shorter distance outwards from the co-star.
+    """
+    if distance[person] == -1:
+        return
+    if distance[neighbor] != -1 and distance[neighbor] <= distance[person] + 1:
+        return
+    distance[neighbor] = distance[person] + 1
+
+    queue = deque([neighbor])
+    while queue:
+        current = queue.popleft()
+        for k in adjacency_range(current):
+            next_person = adjacency_people[k]
+            if distance[next_person] == -1 or distance[current] + 1 < distance[next_person]:
+                distance[next_person] = distance[current] + 1
+                queue.append(next_person)
+
+
 if __name__ == "__main__":
     main()
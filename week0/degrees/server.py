@@ -0,0 +1,80 @@
+import gc
+import json
+import multiprocessing
+import sys
+
+import degrees
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python server.py [directory] [processes]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    processes = int(sys.argv[2]) if len(sys.argv) == 3 else None
+
+    # Load data once, before the workers are forked, so they all share it
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(directory, adjacency=True, cache=True)
+    print("Data loaded.", file=sys.stderr)
+
+    # Keep the garbage collector from touching, and so copying, the shared data
+    gc.freeze()
+
+    # Answer one JSON request per line of input, in order
+    context = multiprocessing.get_context("fork")
+    with context.Pool(processes) as pool:
+        for response in pool.imap(answer, sys.stdin):
+            print(response, flush=True)
+
+
+def answer(line):
+    """
+    Answers a request such as {"source": "102", "target": "158"},
+    where source and target are person ids or unambiguous names.
+
+    Returns the response as a line of JSON.
+    """
+    try:
+        request = json.loads(line)
+
+        if not isinstance(request, dict):
+            return json.dumps({"error": "request must be a JSON object"})
+
+        # Report missing fields before looking anyone up
+        for field in ["source", "target"]:
+            if field not in request:
+                return json.dumps({"error": f"missing field: {field}"})
+        source = resolve(request["source"])
+        target = resolve(request["target"])
+    except (ValueError, TypeError) as e:
+        return json.dumps({"error": str(e)})
+
+    path = degrees.shortest_path(source, target)
+    response = {"source": source, "target": target}
+    if path is None:
+        response["degrees"] = None
+        response["path"] = None
+    else:
+        response["degrees"] = len(path)
+        response["path"] = [list(step) for step in path]
+    return json.dumps(response)
+
+
+def resolve(person):
+    """
+    Returns the person id for a person id or name.
+    """
+    # Ids may be sent as JSON numbers, but are stored as strings
+    person = str(person)
+    if person in degrees.people or person in degrees.person_index:
+        return person
+    person_ids = degrees.ids_for_name(person.lower())
+    if len(person_ids) == 0:
+        raise ValueError(f"person not found: {person}")
+    elif len(person_ids) > 1:
+        raise ValueError(f"ambiguous name: {person}")
+    return next(iter(person_ids))
+
+
+if __name__ == "__main__":
+    main()
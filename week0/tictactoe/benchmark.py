@@ -0,0 +1,64 @@
+import argparse
+
+import bitboard
+import tictactoe as ttt
+
+# Positions to search, as rows read left to right with "." for empty cells
+POSITIONS = [
+    ("empty", "........."),
+    ("center", "....X...."),
+    ("corner", "X........"),
+    ("edge", ".X......."),
+    ("center reply", "O...X...."),
+    ("fork threat", "X...O...X"),
+    ("midgame", "XO..X...O"),
+    ("endgame", "XOXOXO...")
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Count the work minimax does on a set of tictactoe positions."
+    )
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of times to time each position")
+    parser.add_argument("--book", action="store_true",
+                        help="answer from the opening book where possible")
+    args = parser.parse_args()
+
+    if args.book:
+        ttt.use_book()
+
+    print(f"{'position':<16}{'action':>8}{'nodes':>10}{'hits':>10}"
+          f"{'prunes':>10}{'book':>6}{'cold ms':>10}{'warm ms':>10}")
+    for name, position in POSITIONS:
+        board = parse(position)
+
+        # A cold search starts from an empty transposition table
+        bitboard.transpositions.clear()
+        cold = bitboard.SearchStats()
+        action = ttt.minimax(board, cold)
+
+        # Warm searches reuse the table the cold search filled
+        warm = bitboard.SearchStats()
+        for _ in range(args.repeat):
+            ttt.minimax(board, warm)
+
+        print(f"{name:<16}{str(action):>8}{cold.nodes:>10}{cold.cache_hits:>10}"
+              f"{cold.prunes:>10}{cold.book_hits:>6}"
+              f"{cold.seconds * 1000:>10.3f}"
+              f"{warm.seconds / args.repeat * 1000:>10.3f}")
+
+
+def parse(position):
+    """
+    Returns the board for a string of 9 cells, each X, O or ".".
+    """
+    if len(position) != 9 or any(c not in "XO." for c in position):
+        raise ValueError(f"invalid position: {position}")
+    cells = [ttt.EMPTY if c == "." else c for c in position]
+    return [cells[0:3], cells[3:6], cells[6:9]]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Tic Tac Toe on bitboards
+
+A board is a pair of integers (x, o), one mask per player, where the cell
+(i, j) is bit 3 * i + j. Actions are the index of that bit.
+"""
+
+import math
+import time
+
+# The same player markers as tictactoe, which converts to and from list boards
+X = "X"
+O = "O"
+
+# Mask with a bit set for every cell
+FULL = 0b111111111
+
+# Masks of the rows, columns and diagonals
+LINES = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+)
+
+# Whether each possible mask contains a full line, and how many cells it has
+HAS_LINE = tuple(any(mask & line == line for line in LINES) for mask in range(FULL + 1))
+COUNT = tuple(bin(mask).count("1") for mask in range(FULL + 1))
+
+# The 8 rotations and reflections of the board, as the cell each cell moves to
+SYMMETRIES = tuple(
+    tuple(3 * i + j for i, j in (cell(i, j) for i in range(3) for j in range(3)))
+    for cell in (
+        lambda i, j: (i, j),
+        lambda i, j: (j, 2 - i),
+        lambda i, j: (2 - i, 2 - j),
+        lambda i, j: (2 - j, i),
+        lambda i, j: (i, 2 - j),
+        lambda i, j: (2 - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (2 - j, 2 - i)
+    )
+)
+
+# Each symmetry applied to every possible mask
+TRANSFORMS = tuple(
+    tuple(
+        sum(1 << symmetry[i] for i in range(9) if mask >> i & 1)
+        for mask in range(FULL + 1)
+    )
+    for symmetry in SYMMETRIES
+)
+
+# Whether a stored value is exact, or only a lower or upper bound
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Maps keys packing both masks, and whether the board was maximized, to the
+# (value, bound) found when it was searched, so boards reached by different
+# move orders are only searched once
+transpositions = {}
+
+
+class SearchStats():
+    """Counts the work done by searches it is passed to."""
+
+    def __init__(self):
+        self.nodes = 0
+        self.cache_hits = 0
+        self.prunes = 0
+        self.book_hits = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return (f"SearchStats(nodes={self.nodes}, cache_hits={self.cache_hits}, "
+                f"prunes={self.prunes}, book_hits={self.book_hits}, "
+                f"seconds={self.seconds:.6f})")
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return X if COUNT[x] <= COUNT[o] else O
+
+
+def actions(x, o):
+    """
+    Returns list of the indexes of all empty cells on the board.
+    """
+    empty = FULL & ~(x | o)
+    return [i for i in range(9) if empty >> i & 1]
+
+
+def result(x, o, action):
+    """
+    Returns the board that results from making a move on the board.
+    """
+    bit = 1 << action
+    if not 0 <= action < 9 or (x | o) & bit:
+        raise Exception("Invalid action")
+    if player(x, o) == X:
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(x, o):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    if HAS_LINE[x]:
+        return X
+    if HAS_LINE[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return HAS_LINE[x] or HAS_LINE[o] or (x | o) == FULL
+
+
+def utility(x, o):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    if HAS_LINE[x]:
+        return 1
+    if HAS_LINE[o]:
+        return -1
+    return 0
+
+
+def canonical(x, o):
+    """
+    Returns the (x, o, symmetry) triple for the canonical board among all
+    rotations and reflections of a board, where symmetry is the index in
+    SYMMETRIES of the one that turns the board into it.
+    """
+    best = None
+    for symmetry, transform in enumerate(TRANSFORMS):
+        key = transform[x] << 9 | transform[o]
+        if best is None or key < best:
+            best = key
+            best_symmetry = symmetry
+    return best >> 9, best & FULL, best_symmetry
+
+
+def original_action(action, symmetry):
+    """
+    Returns the action on a board that a symmetry turns into the
+    given action on the canonical board.
+    """
+    return SYMMETRIES[symmetry].index(action)
+
+
+def minimax(x, o, stats=None, stop=None):
+    """
+    Returns the optimal action for the current player on the board.
+
+    If stats is a SearchStats, the work done and time taken are added to it.
+    If stop is a threading.Event, setting it from another thread abandons
+    the search after the move being searched, and None is returned.
+    """
+    if terminal(x, o):
+        return None
+    start = time.perf_counter()
+
+    best_action = None
+    empty = FULL & ~(x | o)
+
+    # Moves that lead to rotations or reflections of the same board
+    # are only searched once
+    searched = set()
+
+    if player(x, o) == X:
+        best_value = -math.inf
+        while empty:
+            move = empty & -empty
+            empty ^= move
+            if stop is not None and stop.is_set():
+                return None
+            child = canonical(x | move, o)[:2]
+            if child in searched:
+                continue
+            searched.add(child)
+            value = min_value(*child, best_value, math.inf, stats)
+            if value > best_value:
+                best_value = value
+                best_action = move.bit_length() - 1
+    else:
+        best_value = math.inf
+        while empty:
+            move = empty & -empty
+            empty ^= move
+            if stop is not None and stop.is_set():
+                return None
+            child = canonical(x, o | move)[:2]
+            if child in searched:
+                continue
+            searched.add(child)
+            value = max_value(*child, -math.inf, best_value, stats)
+            if value < best_value:
+                best_value = value
+                best_action = move.bit_length() - 1
+
+    if stats is not None:
+        stats.seconds += time.perf_counter() - start
+    return best_action
+
+
+def max_value(x, o, alpha=-math.inf, beta=math.inf, stats=None):
+    """
+    Returns the maximum utility value for a canonical board where it is X's turn.
+
+    Values at or below alpha, or at or above beta, can't change the choice
+    being made further up the tree, so the search stops once it finds one
+    and returns it as a bound instead.
+
+    If stats is a SearchStats, the work done is added to it.
+    """
+    if stats is not None:
+        stats.nodes += 1
+
+    # Reuse the value of this board if it has been searched before
+    key = x << 10 | o << 1 | 1
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, bound = entry
+        if bound == EXACT or (bound == LOWER and value >= beta) or (
+            bound == UPPER and value <= alpha
+        ):
+            if stats is not None:
+                stats.cache_hits += 1
+            return value
+        elif bound == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+
+    # O may have just won, or the board may be full
+    if HAS_LINE[o]:
+        return -1
+    empty = FULL & ~(x | o)
+    if not empty:
+        return 0
+
+    original_alpha = alpha
+    value = -math.inf
+    searched = set()
+    while empty:
+        move = empty & -empty
+        empty ^= move
+
+        # Only search one board out of each set of rotations and reflections
+        child = canonical(x | move, o)[:2]
+        if child in searched:
+            continue
+        searched.add(child)
+        value = max(value, min_value(*child, alpha, beta, stats))
+
+        # Stop once the minimizing player would never allow this board
+        alpha = max(alpha, value)
+        if alpha >= beta:
+            if stats is not None:
+                stats.prunes += 1
+            break
+
+    store(key, value, original_alpha, beta)
+    return value
+
+
+def min_value(x, o, alpha=-math.inf, beta=math.inf, stats=None):
+    """
+    Returns the minimum utility value for a canonical board where it is O's turn.
+
+    Values at or below alpha, or at or above beta, can't change the choice
+    being made further up the tree, so the search stops once it finds one
+    and returns it as a bound instead.
+
+    If stats is a SearchStats, the work done is added to it.
+    """
+    if stats is not None:
+        stats.nodes += 1
+
+    # Reuse the value of this board if it has been searched before
+    key = x << 10 | o << 1
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, bound = entry
+        if bound == EXACT or (bound == LOWER and value >= beta) or (
+            bound == UPPER and value <= alpha
+        ):
+            if stats is not None:
+                stats.cache_hits += 1
+            return value
+        elif bound == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+
+    # X may have just won, or the board may be full
+    if HAS_LINE[x]:
+        return 1
+    empty = FULL & ~(x | o)
+    if not empty:
+        return 0
+
+    original_beta = beta
+    value = math.inf
+    searched = set()
+    while empty:
+        move = empty & -empty
+        empty ^= move
+
+        # Only search one board out of each set of rotations and reflections
+        child = canonical(x, o | move)[:2]
+        if child in searched:
+            continue
+        searched.add(child)
+        value = min(value, max_value(*child, alpha, beta, stats))
+
+        # Stop once the maximizing player would never allow this board
+        beta = min(beta, value)
+        if alpha >= beta:
+            if stats is not None:
+                stats.prunes += 1
+            break
+
+    store(key, value, alpha, original_beta)
+    return value
+
+
+def store(key, value, alpha, beta):
+    """
+    Records the value of a board searched between alpha and beta,
+    noting whether it is exact or only a bound on the true value.
+    """
+    if value <= alpha:
+        transpositions[key] = (value, UPPER)
+    elif value >= beta:
+        transpositions[key] = (value, LOWER)
+    else:
+        transpositions[key] = (value, EXACT)
@@ -0,0 +1,115 @@
+"""
+Tic Tac Toe opening book
+
+Solves every reachable board once and stores the best action and value for
+each in a table with one byte per possible board, indexed by reading the
+board as a base 3 number. Only the canonical board out of each set of
+rotations and reflections is stored.
+"""
+
+import sys
+
+import bitboard
+
+# Bytes at the start of a book file
+MAGIC = b"TTT1"
+
+# Number of possible boards, reachable or not
+SIZE = 3 ** 9
+
+# Value of each mask's cells as base 3 digits, so a board's index is
+# DIGITS[x] + 2 * DIGITS[o]
+DIGITS = tuple(
+    sum(3 ** i for i in range(9) if mask >> i & 1)
+    for mask in range(bitboard.FULL + 1)
+)
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else "book.bin"
+
+    table = generate()
+    save(table, path)
+    solved = sum(1 for entry in table if entry)
+    print(f"Wrote {solved} solved boards to {path}.")
+
+
+def generate():
+    """
+    Returns a book table with the best action and value for every
+    reachable canonical board that is not terminal.
+    """
+    table = bytearray(SIZE)
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen or bitboard.terminal(x, o):
+            continue
+        seen.add((x, o))
+
+        action = bitboard.minimax(x, o)
+        if bitboard.player(x, o) == bitboard.X:
+            value = bitboard.max_value(x, o)
+        else:
+            value = bitboard.min_value(x, o)
+        table[index(x, o)] = encode(action, value)
+
+        for move in bitboard.actions(x, o):
+            stack.append(bitboard.canonical(*bitboard.result(x, o, move))[:2])
+    return table
+
+
+def index(x, o):
+    """
+    Returns the position of a board in a book table.
+    """
+    return DIGITS[x] + 2 * DIGITS[o]
+
+
+def encode(action, value):
+    """
+    Packs an action and a value of -1, 0 or 1 into one byte,
+    leaving 0 free to mark boards that are not in the book.
+    """
+    return (value + 1) << 4 | (action + 1)
+
+
+def lookup(table, x, o):
+    """
+    Returns the (action, value) pair stored for a board,
+    or None if the board is not in the book.
+    """
+    # Look up the canonical board, then turn its action back to match this one
+    x, o, symmetry = bitboard.canonical(x, o)
+    entry = table[index(x, o)]
+    if not entry:
+        return None
+    action = bitboard.original_action((entry & 0xF) - 1, symmetry)
+    return action, (entry >> 4) - 1
+
+
+def save(table, path):
+    """
+    Writes a book table to a file.
+    """
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(table)
+
+
+def load(path):
+    """
+    Reads a book table from a file.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC or len(data) != len(MAGIC) + SIZE:
+        raise Exception("invalid opening book")
+    return data[len(MAGIC):]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+m,n,k-game Player
+
+Tic-tac-toe generalized to boards with any number of rows and columns,
+won by the first player to get k marks in a row. Boards are lists of rows
+like in tictactoe, so the same runner and helpers work with them.
+"""
+
+import math
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Score for a won game, larger than any heuristic evaluation
+WIN = 10 ** 9
+
+
+class SearchTimeout(Exception):
+    """Raised inside a search when its time budget runs out."""
+
+
+class Game():
+
+    def __init__(self, rows=3, columns=3, k=3):
+        if not 1 <= k <= max(rows, columns):
+            raise ValueError("k must fit on the board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+
+        # Every line of k cells in a row, column or diagonal
+        self.windows = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < columns:
+                        self.windows.append(
+                            tuple((i + di * step, j + dj * step) for step in range(k))
+                        )
+
+        # The windows that pass through each cell
+        self.windows_through = {
+            (i, j): [] for i in range(rows) for j in range(columns)
+        }
+        for window in self.windows:
+            for cell in window:
+                self.windows_through[cell].append(window)
+
+        # Cells ordered from the center outwards, which are usually better moves
+        center = ((rows - 1) / 2, (columns - 1) / 2)
+        self.cells = sorted(
+            self.windows_through,
+            key=lambda cell: abs(cell[0] - center[0]) + abs(cell[1] - center[1])
+        )
+
+        # Heuristic value of an open window holding a given number of one player's marks
+        self.scores = [0] + [10 ** count for count in range(1, k)]
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.columns for _ in range(self.rows)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x_count = sum(row.count(X) for row in board)
+        o_count = sum(row.count(O) for row in board)
+        return X if x_count <= o_count else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {cell for cell in self.cells if board[cell[0]][cell[1]] == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.columns) or board[i][j] != EMPTY:
+            raise Exception("Invalid action")
+        new_board = [list(row) for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        for window in self.windows:
+            i, j = window[0]
+            mark = board[i][j]
+            if mark != EMPTY and all(board[i][j] == mark for i, j in window):
+                return mark
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        if self.winner(board) is not None:
+            return True
+        return all(cell != EMPTY for row in board for cell in row)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        game_winner = self.winner(board)
+        if game_winner == X:
+            return 1
+        elif game_winner == O:
+            return -1
+        return 0
+
+    def evaluate(self, board):
+        """
+        Returns a heuristic value of a board for X, counting every window
+        that only one player has marks in, weighted by how full it is.
+        """
+        value = 0
+        for window in self.windows:
+            x_count = o_count = 0
+            for i, j in window:
+                if board[i][j] == X:
+                    x_count += 1
+                elif board[i][j] == O:
+                    o_count += 1
+            if not o_count:
+                value += self.scores[x_count]
+            elif not x_count:
+                value -= self.scores[o_count]
+        return value
+
+    def wins_at(self, board, cell):
+        """
+        Returns True if the mark at a cell completes a window.
+        """
+        mark = board[cell[0]][cell[1]]
+        return any(
+            all(board[i][j] == mark for i, j in window)
+            for window in self.windows_through[cell]
+        )
+
+    def minimax(self, board, time_limit=1.0, max_depth=None, stop=None):
+        """
+        Returns the best action found for the current player on the board,
+        searching deeper and deeper until time_limit seconds have passed
+        or max_depth moves ahead have been searched.
+
+        If stop is a threading.Event, setting it from another thread
+        ends the search early, as if its time had run out.
+        """
+        if self.terminal(board):
+            return None
+
+        board = [list(row) for row in board]
+        sign = 1 if self.player(board) == X else -1
+        empty = sum(row.count(EMPTY) for row in board)
+        if max_depth is None or max_depth > empty:
+            max_depth = empty
+        deadline = time.monotonic() + time_limit
+
+        # Always have a move ready, even if the first search runs out of time
+        best_action = next(cell for cell in self.cells if board[cell[0]][cell[1]] == EMPTY)
+        for depth in range(1, max_depth + 1):
+            try:
+                action, value = self.search_root(board, depth, sign, best_action, deadline, stop)
+            except SearchTimeout:
+                break
+            best_action = action
+
+            # Stop once the game is decided either way
+            if abs(value) >= WIN:
+                break
+
+        return best_action
+
+    def search_root(self, board, depth, sign, first, deadline, stop):
+        """
+        Searches every move on a board to a given depth, trying the move
+        first that was best at the previous depth.
+
+        Returns the best action and its value for the player to move.
+        """
+        moves = [first] + [
+            cell for cell in self.cells
+            if cell != first and board[cell[0]][cell[1]] == EMPTY
+        ]
+        mark = X if sign == 1 else O
+
+        best_action = None
+        best_value = -math.inf
+        alpha = -math.inf
+        for i, j in moves:
+            board[i][j] = mark
+            try:
+                value = -self.negamax(
+                    board, depth - 1, -math.inf, -alpha, -sign, (i, j), deadline, stop
+                )
+            finally:
+                board[i][j] = EMPTY
+            if value > best_value:
+                best_value = value
+                best_action = (i, j)
+            alpha = max(alpha, value)
+        return best_action, best_value
+
+    def negamax(self, board, depth, alpha, beta, sign, last, deadline, stop):
+        """
+        Returns the value of a board for the player to move, where sign
+        is 1 for X and -1 for O and last is the cell just played, searching
+        depth moves ahead and pruning values outside alpha and beta.
+
+        Raises SearchTimeout once the deadline passes or stop is set.
+        """
+        if time.monotonic() > deadline or (stop is not None and stop.is_set()):
+            raise SearchTimeout
+
+        # The player who just moved may have won; sooner wins score higher
+        if self.wins_at(board, last):
+            return -(WIN + depth)
+        if depth == 0:
+            return sign * self.evaluate(board)
+
+        mark = X if sign == 1 else O
+        value = -math.inf
+        moved = False
+        for i, j in self.cells:
+            if board[i][j] != EMPTY:
+                continue
+            moved = True
+            board[i][j] = mark
+            try:
+                value = max(value, -self.negamax(
+                    board, depth - 1, -beta, -alpha, -sign, (i, j), deadline, stop
+                ))
+            finally:
+                board[i][j] = EMPTY
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        # A full board with no winner is a tie
+        if not moved:
+            return 0
+        return value
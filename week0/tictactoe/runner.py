@@ -1,6 +1,8 @@
 import pygame
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
@@ -19,14 +21,28 @@ moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# The AI thinks in a background thread so the window keeps responding,
+# and each search gets its own event that abandons it once set
+executor = ThreadPoolExecutor(max_workers=1)
+ai_move = None
+ai_started = None
+ai_stop = None
 
 while True:
 
+    restart = False
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            if ai_stop is not None:
+                ai_stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
 
+        # Start over at any time with the R key
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
+            restart = True
+
     screen.fill(black)
 
     # Let user choose a player.
@@ -108,15 +124,16 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, starting it if needed and using it once it is
+        # ready, but not before the "thinking" title has been shown for a moment
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_stop = threading.Event()
+                ai_move = executor.submit(ttt.minimax, board, stop=ai_stop)
+                ai_started = time.time()
+            elif ai_move.done() and time.time() - ai_started >= 0.5:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -139,8 +156,17 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    restart = True
+
+    if restart:
+        user = None
+        board = ttt.initial_state()
+
+        # Stop any move still being computed for the old game, so the
+        # first move of the new one doesn't wait behind it
+        if ai_move is not None:
+            ai_stop.set()
+            ai_move.cancel()
+            ai_move = None
 
     pygame.display.flip()
@@ -0,0 +1,101 @@
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+
+import tictactoe as ttt
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play tictactoe games without a window and report the results."
+    )
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--opponent", choices=["ai", "random"], default="random",
+                        help="who plays against the AI")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="number of worker processes, one per CPU by default")
+    parser.add_argument("--book", action="store_true",
+                        help="answer from the opening book where possible")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Load the book once, before the workers are forked, so they all share it
+    if args.book:
+        ttt.use_book()
+
+    games = [(args.opponent, args.seed + i, ttt.X if i % 2 == 0 else ttt.O)
+             for i in range(args.games)]
+
+    start = time.perf_counter()
+    context = multiprocessing.get_context("fork")
+    with context.Pool(args.processes) as pool:
+        results = list(pool.imap_unordered(play, games, chunksize=16))
+    seconds = time.perf_counter() - start
+
+    outcomes = {ttt.X: 0, ttt.O: 0, None: 0}
+    losses = 0
+    latencies = []
+    for winner, moves, ai in results:
+        outcomes[winner] += 1
+        latencies.extend(moves)
+
+        # The AI plays perfectly, so it must never lose
+        if winner is not None and (ai is None or winner != ai):
+            losses += 1
+
+    print(f"games:      {len(results)} in {seconds:.2f} s "
+          f"({len(results) / seconds:.0f} games/s)")
+    print(f"X wins:     {outcomes[ttt.X]}")
+    print(f"O wins:     {outcomes[ttt.O]}")
+    print(f"ties:       {outcomes[None]}")
+    print(f"AI losses:  {losses}")
+    print(f"AI moves:   {len(latencies)}")
+    if latencies:
+        print(f"latency ms: p50 {percentile(latencies, 50) * 1000:.3f}, "
+              f"p90 {percentile(latencies, 90) * 1000:.3f}, "
+              f"p99 {percentile(latencies, 99) * 1000:.3f}, "
+              f"max {max(latencies) * 1000:.3f}")
+
+    if losses:
+        sys.exit(f"AI lost {losses} games")
+
+
+def play(game):
+    """
+    Plays one game, where opponent is "ai" or "random", seed seeds the random
+    player and ai is the player the AI controls against a random opponent.
+
+    Returns the winner, the time taken by each AI move and the player
+    the AI controlled, or None if it played both sides.
+    """
+    opponent, seed, ai = game
+    if opponent == "ai":
+        ai = None
+    rng = random.Random(seed)
+
+    board = ttt.initial_state()
+    latencies = []
+    while not ttt.terminal(board):
+        if ai is None or ttt.player(board) == ai:
+            start = time.perf_counter()
+            action = ttt.minimax(board)
+            latencies.append(time.perf_counter() - start)
+        else:
+            action = rng.choice(sorted(ttt.actions(board)))
+        board = ttt.result(board, action)
+
+    return ttt.winner(board), latencies, ai
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of a list of values.
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, len(values) * p // 100)]
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,19 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+import os
+import time
+
+import bitboard
+import book
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Best action for every reachable board, once loaded by use_book
+opening_book = None
+
 
 def initial_state():
     """
@@ -53,18 +60,15 @@ def result(board, action):
     Returns the board that results from making move (i, j) on the board.
     """
     # Check if the action is valid
-    if action not in actions(board):
+    i, j = action
+    if not (0 <= i < 3 and 0 <= j < 3) or board[i][j] != EMPTY:
         raise Exception("Invalid action")
 
-    # Make a deep copy of the board to avoid modifying the original
-    new_board = copy.deepcopy(board)
+    # Copy each row to avoid modifying the original
+    new_board = [list(row) for row in board]
 
-    # Get the current player
-    current_player = player(board)
-
-    # Make the move
-    i, j = action
-    new_board[i][j] = current_player
+    # Make the move for the current player
+    new_board[i][j] = player(board)
 
     return new_board
 
@@ -126,82 +130,96 @@ def utility(board):
         return 0
 
 
-def minimax(board):
+def minimax(board, stats=None, stop=None):
     """
     Returns the optimal action for the current player on the board.
+
+    If stats is a bitboard.SearchStats, the work done is added to it.
+    If stop is a threading.Event, setting it from another thread abandons
+    the search, which then returns None.
     """
     # If the board is terminal, return None
     if terminal(board):
         return None
 
-    current_player = player(board)
+    x, o = to_bitboard(board)
+
+    # Answer straight from the opening book if one is loaded
+    if opening_book is not None:
+        start = time.perf_counter()
+        entry = book.lookup(opening_book, x, o)
+        if entry is not None:
+            if stats is not None:
+                stats.book_hits += 1
+                stats.seconds += time.perf_counter() - start
+            return divmod(entry[0], 3)
+
+    # Search on the bitboard, which needs no copying between moves
+    action = bitboard.minimax(x, o, stats, stop)
+    if action is None:
+        return None
+    return divmod(action, 3)
 
-    # If it's X's turn, maximize the utility
-    if current_player == X:
-        best_value = float('-inf')
-        best_action = None
 
-        # Try all possible actions
-        for action in actions(board):
-            # Get the value of the action
-            value = min_value(result(board, action))
+def use_book(path="book.bin"):
+    """
+    Loads the opening book at path, generating it first if it doesn't
+    exist, so that minimax answers every reachable board from it.
+    """
+    global opening_book
+    if not os.path.exists(path):
+        book.save(book.generate(), path)
+    opening_book = book.load(path)
 
-            # Update best value and action if necessary
-            if value > best_value:
-                best_value = value
-                best_action = action
 
-        return best_action
+def max_value(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the maximum utility value for a board where it is X's turn.
 
-    # If it's O's turn, minimize the utility
-    else:
-        best_value = float('inf')
-        best_action = None
+    Values at or below alpha, or at or above beta, can't change the choice
+    being made further up the tree, so the search stops once it finds one
+    and returns it as a bound instead.
+    """
+    x, o, _ = bitboard.canonical(*to_bitboard(board))
+    return bitboard.max_value(x, o, alpha, beta)
 
-        # Try all possible actions
-        for action in actions(board):
-            # Get the value of the action
-            value = max_value(result(board, action))
 
-            # Update best value and action if necessary
-            if value < best_value:
-                best_value = value
-                best_action = action
+def min_value(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the minimum utility value for a board where it is O's turn.
 
-        return best_action
+    Values at or below alpha, or at or above beta, can't change the choice
+    being made further up the tree, so the search stops once it finds one
+    and returns it as a bound instead.
+    """
+    x, o, _ = bitboard.canonical(*to_bitboard(board))
+    return bitboard.min_value(x, o, alpha, beta)
 
 
-def max_value(board):
+def to_bitboard(board):
     """
-    Returns the maximum utility value for a given board.
+    Returns the (x, o) bitboard for a board, where the cell (i, j) is bit 3 * i + j.
     """
-    # If the board is terminal, return its utility
-    if terminal(board):
-        return utility(board)
-
-    value = float('-inf')
-
-    # Try all possible actions
-    for action in actions(board):
-        # Update value with the maximum of the current value and the minimum value of the result
-        value = max(value, min_value(result(board, action)))
-
-    return value
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
 
 
-def min_value(board):
+def from_bitboard(x, o):
     """
-    Returns the minimum utility value for a given board.
+    Returns the board for an (x, o) bitboard.
     """
-    # If the board is terminal, return its utility
-    if terminal(board):
-        return utility(board)
-
-    value = float('inf')
-
-    # Try all possible actions
-    for action in actions(board):
-        # Update value with the minimum of the current value and the maximum value of the result
-        value = min(value, max_value(result(board, action)))
-
-    return value
\ No newline at end of file
+    board = initial_state()
+    for i in range(3):
+        for j in range(3):
+            bit = 1 << (3 * i + j)
+            if x & bit:
+                board[i][j] = X
+            elif o & bit:
+                board[i][j] = O
+    return board
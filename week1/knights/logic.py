@@ -1,12 +1,38 @@
 import itertools
+import multiprocessing
+import os
+import weakref
+
+# Shared, immutable sentences made by intern_sentence, keyed by their structure
+interned = weakref.WeakValueDictionary()
+
+# Sentences and symbols a worker process checks parts of the models of
+shared = None
 
 
 class Sentence():
 
+    # Set on the shared, immutable sentences returned by intern_sentence,
+    # which remember their hash and symbols instead of recomputing them
+    frozen = False
+
+    def __setattr__(self, name, value):
+        if self.frozen:
+            raise Exception("cannot change an interned sentence")
+        super().__setattr__(name, value)
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
 
+    def evaluate_partial(self, model):
+        """
+        Evaluates the logical sentence in a model that may leave some
+        symbols out. Returns True or False if the sentence has that value
+        whatever the missing symbols are, and None if it depends on them.
+        """
+        raise Exception("nothing to evaluate")
+
     def formula(self):
         """Returns string formula representing logical sentence."""
         return ""
@@ -15,11 +41,33 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def expression(self, indexes, lines):
+        """
+        Appends to lines Python statements evaluating the sentence, where
+        symbol i is m[i], and returns an expression for its value.
+        """
+        raise Exception("nothing to compile")
+
+    def truth_table(self, columns, full):
+        """
+        Evaluates the sentence in many models at once, where bit k of
+        columns[name] is the symbol's value in model k and full has a bit
+        set for every model. Returns the bits of the models where it is true.
+        """
+        raise Exception("nothing to evaluate")
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    @classmethod
+    def temporary(cls, lines, expression):
+        """Appends a line assigning an expression to a new variable, and returns its name."""
+        name = f"t{len(lines)}"
+        lines.append(f"{name} = {expression}")
+        return name
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -51,6 +99,8 @@ class Symbol(Sentence):
         return isinstance(other, Symbol) and self.name == other.name
 
     def __hash__(self):
+        if self.frozen:
+            return self.cached_hash
         return hash(("symbol", self.name))
 
     def __repr__(self):
@@ -62,12 +112,30 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
+    def evaluate_partial(self, model):
+        value = model.get(self.name)
+        return None if value is None else bool(value)
+
     def formula(self):
         return self.name
 
     def symbols(self):
+        if self.frozen:
+            return set(self.cached_symbols)
         return {self.name}
 
+    def expression(self, indexes, lines):
+        try:
+            return f"m[{indexes[self.name]}]"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
+    def truth_table(self, columns, full):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -78,6 +146,8 @@ class Not(Sentence):
         return isinstance(other, Not) and self.operand == other.operand
 
     def __hash__(self):
+        if self.frozen:
+            return self.cached_hash
         return hash(("not", hash(self.operand)))
 
     def __repr__(self):
@@ -86,12 +156,25 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
+    def evaluate_partial(self, model):
+        value = self.operand.evaluate_partial(model)
+        return None if value is None else not value
+
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
     def symbols(self):
+        if self.frozen:
+            return set(self.cached_symbols)
         return self.operand.symbols()
 
+    def expression(self, indexes, lines):
+        operand = self.operand.expression(indexes, lines)
+        return Sentence.temporary(lines, f"not {operand}")
+
+    def truth_table(self, columns, full):
+        return full ^ self.operand.truth_table(columns, full)
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -100,9 +183,12 @@ class And(Sentence):
         self.conjuncts = list(conjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return (isinstance(other, And)
+                and tuple(self.conjuncts) == tuple(other.conjuncts))
 
     def __hash__(self):
+        if self.frozen:
+            return self.cached_hash
         return hash(
             ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
         )
@@ -114,12 +200,24 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        if self.frozen:
+            raise Exception("cannot add to an interned sentence")
         Sentence.validate(conjunct)
         self.conjuncts.append(conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
+    def evaluate_partial(self, model):
+        result = True
+        for conjunct in self.conjuncts:
+            value = conjunct.evaluate_partial(model)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
@@ -127,8 +225,23 @@ class And(Sentence):
                            for conjunct in self.conjuncts])
 
     def symbols(self):
+        if self.frozen:
+            return set(self.cached_symbols)
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def expression(self, indexes, lines):
+        return Sentence.temporary(lines, " and ".join(
+            [conjunct.expression(indexes, lines) for conjunct in self.conjuncts]
+        ) or "True")
+
+    def truth_table(self, columns, full):
+        table = full
+        for conjunct in self.conjuncts:
+            table &= conjunct.truth_table(columns, full)
+            if not table:
+                break
+        return table
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -137,9 +250,12 @@ class Or(Sentence):
         self.disjuncts = list(disjuncts)
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return (isinstance(other, Or)
+                and tuple(self.disjuncts) == tuple(other.disjuncts))
 
     def __hash__(self):
+        if self.frozen:
+            return self.cached_hash
         return hash(
             ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
         )
@@ -151,6 +267,16 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
+    def evaluate_partial(self, model):
+        result = False
+        for disjunct in self.disjuncts:
+            value = disjunct.evaluate_partial(model)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+
     def formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
@@ -158,8 +284,23 @@ class Or(Sentence):
                             for disjunct in self.disjuncts])
 
     def symbols(self):
+        if self.frozen:
+            return set(self.cached_symbols)
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def expression(self, indexes, lines):
+        return Sentence.temporary(lines, " or ".join(
+            [disjunct.expression(indexes, lines) for disjunct in self.disjuncts]
+        ) or "False")
+
+    def truth_table(self, columns, full):
+        table = 0
+        for disjunct in self.disjuncts:
+            table |= disjunct.truth_table(columns, full)
+            if table == full:
+                break
+        return table
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -174,6 +315,8 @@ class Implication(Sentence):
                 and self.consequent == other.consequent)
 
     def __hash__(self):
+        if self.frozen:
+            return self.cached_hash
         return hash(("implies", hash(self.antecedent), hash(self.consequent)))
 
     def __repr__(self):
@@ -183,14 +326,36 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
+    def evaluate_partial(self, model):
+        antecedent = self.antecedent.evaluate_partial(model)
+        if antecedent is False:
+            return True
+        consequent = self.consequent.evaluate_partial(model)
+        if consequent is True:
+            return True
+        if antecedent is True and consequent is False:
+            return False
+        return None
+
     def formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
     def symbols(self):
+        if self.frozen:
+            return set(self.cached_symbols)
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def expression(self, indexes, lines):
+        antecedent = self.antecedent.expression(indexes, lines)
+        consequent = self.consequent.expression(indexes, lines)
+        return Sentence.temporary(lines, f"not {antecedent} or {consequent}")
+
+    def truth_table(self, columns, full):
+        return ((full ^ self.antecedent.truth_table(columns, full))
+                | self.consequent.truth_table(columns, full))
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -205,6 +370,8 @@ class Biconditional(Sentence):
                 and self.right == other.right)
 
     def __hash__(self):
+        if self.frozen:
+            return self.cached_hash
         return hash(("biconditional", hash(self.left), hash(self.right)))
 
     def __repr__(self):
@@ -216,14 +383,90 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
+    def evaluate_partial(self, model):
+        left = self.left.evaluate_partial(model)
+        if left is None:
+            return None
+        right = self.right.evaluate_partial(model)
+        if right is None:
+            return None
+        return left == right
+
     def formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
     def symbols(self):
+        if self.frozen:
+            return set(self.cached_symbols)
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def expression(self, indexes, lines):
+        left = self.left.expression(indexes, lines)
+        right = self.right.expression(indexes, lines)
+        return Sentence.temporary(lines, f"{left} == {right}")
+
+    def truth_table(self, columns, full):
+        return full ^ (self.left.truth_table(columns, full)
+                       ^ self.right.truth_table(columns, full))
+
+
+def intern_sentence(sentence, memo=None):
+    """
+    Returns a shared, immutable sentence equal to the given one. While it
+    exists, interning any equal sentence returns the same object, so
+    repeated subsentences are stored once.
+    """
+    Sentence.validate(sentence)
+    if sentence.frozen:
+        return sentence
+
+    # Sentences that appear more than once in the tree are only interned once
+    if memo is None:
+        memo = {}
+    if id(sentence) in memo:
+        return memo[id(sentence)]
+
+    if isinstance(sentence, Symbol):
+        kind, arguments = Symbol, [sentence.name]
+    elif isinstance(sentence, Not):
+        kind, arguments = Not, [sentence.operand]
+    elif isinstance(sentence, And):
+        kind, arguments = And, sentence.conjuncts
+    elif isinstance(sentence, Or):
+        kind, arguments = Or, sentence.disjuncts
+    elif isinstance(sentence, Implication):
+        kind, arguments = Implication, [sentence.antecedent, sentence.consequent]
+    elif isinstance(sentence, Biconditional):
+        kind, arguments = Biconditional, [sentence.left, sentence.right]
+    else:
+        raise TypeError(f"cannot intern {sentence}")
+
+    # Interned parts are unique, so their ids identify their structure, and
+    # they stay alive as long as any sentence made from them does
+    if kind is Symbol:
+        key = (kind, sentence.name)
+    else:
+        arguments = [intern_sentence(argument, memo) for argument in arguments]
+        key = (kind, *[id(argument) for argument in arguments])
+
+    node = interned.get(key)
+    if node is None:
+        node = kind(*arguments)
+
+        # Parts are kept in tuples, so they can't be changed in place either
+        if kind is And:
+            node.conjuncts = tuple(node.conjuncts)
+        elif kind is Or:
+            node.disjuncts = tuple(node.disjuncts)
+        node.cached_hash = hash(node)
+        node.cached_symbols = frozenset(node.symbols())
+        node.frozen = True
+        interned[key] = node
+    memo[id(sentence)] = node
+    return node
+
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
@@ -231,33 +474,211 @@ def model_check(knowledge, query):
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+        # If knowledge base is false however the model is completed,
+        # or query is true however it is completed, entailment holds
+        knowledge_value = knowledge.evaluate_partial(model)
+        if knowledge_value is False:
+            return True
+        query_value = query.evaluate_partial(model)
+        if query_value is True:
             return True
-        else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+        # If knowledge base is true and query is false, entailment fails.
+        # Once model has an assignment for each symbol, one of these applies
+        if knowledge_value is True and query_value is False:
+            return False
+
+        # Choose one of the remaining unused symbols
+        remaining = symbols.copy()
+        p = remaining.pop()
+
+        # Ensure entailment holds with the symbol true and with it false,
+        # reusing one model and removing the symbol again afterwards
+        model[p] = True
+        holds = check_all(knowledge, query, remaining, model)
+        if holds:
+            model[p] = False
+            holds = check_all(knowledge, query, remaining, model)
+        del model[p]
+        return holds
 
     # Get all symbols in both knowledge and query
     symbols = set.union(knowledge.symbols(), query.symbols())
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def compile_sentence(sentence, symbols):
+    """
+    Compiles a sentence into a function that evaluates it from a sequence
+    of truth values, one for each symbol name in symbols, in order.
+    """
+    indexes = {symbol: i for i, symbol in enumerate(symbols)}
+
+    # Every connective gets its own line, so deeply nested sentences don't
+    # become deeply nested source, which Python refuses to compile
+    lines = []
+    value = sentence.expression(indexes, lines)
+    source = "def evaluate(m):\n"
+    for line in lines:
+        source += f"    {line}\n"
+    source += f"    return {value}\n"
+    namespace = {}
+    exec(source, namespace)
+    return namespace["evaluate"]
+
+
+def truth_columns(count):
+    """
+    Returns the column of each of count symbols over all 2^count models,
+    where model k gives symbol i the value of bit i of k.
+    """
+    size = 1 << count
+    columns = []
+    for i in range(count):
+
+        # Start from one run of 0s then 1s, and double it until it covers every model
+        width = 1 << i
+        column = ((1 << width) - 1) << width
+        length = 2 * width
+        while length < size:
+            column |= column << length
+            length *= 2
+        columns.append(column)
+    return columns
+
+
+def truth_blocks(symbols, block=20, model=None):
+    """
+    Yields (columns, full) pairs for use with truth_table that together cover
+    every model of symbols agreeing with model, up to 2^block models at a time.
+    """
+    model = model or {}
+    free = [symbol for symbol in symbols if symbol not in model]
+    inner = free[:block]
+    outer = free[block:]
+    full = (1 << (1 << len(inner))) - 1
+    columns = dict(zip(inner, truth_columns(len(inner))))
+    columns.update({symbol: full if model[symbol] else 0 for symbol in model})
+
+    # Symbols past the first block are the same in every model of a block
+    for values in itertools.product((full, 0), repeat=len(outer)):
+        columns.update(zip(outer, values))
+        yield columns, full
+
+
+def model_check_table(knowledge, query, block=20, model=None):
+    """
+    Checks if knowledge base entails query, evaluating up to 2^block
+    models at a time as bits of one integer. If model is given, only
+    models that agree with it are checked.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    for columns, full in truth_blocks(symbols, block, model):
+
+        # Look for a model where knowledge is true and query is false
+        if knowledge.truth_table(columns, full) & ~query.truth_table(columns, full):
+            return False
+    return True
+
+
+def model_check_all(knowledge, queries, block=20):
+    """
+    Checks which of many queries knowledge base entails, evaluating it
+    once for all of them. Returns a list of bools in the order of queries.
+    """
+    symbols = sorted(set.union(knowledge.symbols(),
+                               *[query.symbols() for query in queries]))
+    entailed = [True] * len(queries)
+    for columns, full in truth_blocks(symbols, block):
+        models = knowledge.truth_table(columns, full)
+        if not models:
+            continue
+
+        # Only queries that no earlier block has ruled out need checking
+        for i, query in enumerate(queries):
+            if entailed[i] and models & ~query.truth_table(columns, full):
+                entailed[i] = False
+        if not any(entailed):
+            break
+    return entailed
+
+
+def count_models(knowledge, block=20, model=None):
+    """
+    Returns the number of models of knowledge base's symbols where it is
+    true. If model is given, only models that agree with it are counted.
+    """
+    symbols = sorted(knowledge.symbols())
+    return sum(bin(knowledge.truth_table(columns, full)).count("1")
+               for columns, full in truth_blocks(symbols, block, model))
+
+
+def model_check_parallel(knowledge, query, processes=None, split=None):
+    """
+    Checks if knowledge base entails query, dividing the models between
+    processes by the values of the first split symbols. Stops every
+    process as soon as one finds a model where the query is false.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+    results = run_parts(check_part, (knowledge, query), symbols, processes, split)
+    for holds in results:
+        if not holds:
+            results.close()
+            return False
+    return True
+
+
+def count_models_parallel(knowledge, processes=None, split=None):
+    """
+    Returns the number of models where knowledge base is true, dividing
+    the models between processes by the values of the first split symbols.
+    """
+    symbols = sorted(knowledge.symbols())
+    return sum(run_parts(count_part, (knowledge,), symbols, processes, split))
+
+
+def run_parts(function, sentences, symbols, processes, split):
+    """
+    Yields the result of calling function in a pool of processes for every
+    assignment of the first split symbols, in the order they finish.
+    Closing the generator early stops any processes still working.
+    """
+    if processes is None:
+        processes = os.cpu_count()
+
+    # By default make a few parts per process, so uneven parts even out
+    if split is None:
+        split = (processes - 1).bit_length() + 2
+    split = min(split, len(symbols))
+
+    # Workers are forked, so they share the sentences without copying them
+    context = multiprocessing.get_context("fork")
+    with context.Pool(processes, initializer=share,
+                      initargs=(sentences, symbols[:split])) as pool:
+        yield from pool.imap_unordered(function, range(1 << split))
+
+
+def share(sentences, symbols):
+    """Stores the sentences and split symbols in a worker process."""
+    global shared
+    shared = (sentences, symbols)
+
+
+def part_model(part):
+    """Returns the values of the split symbols in part number part."""
+    symbols = shared[1]
+    return {symbol: bool(part >> i & 1) for i, symbol in enumerate(symbols)}
+
+
+def check_part(part):
+    """Checks entailment in every model of one part, in a worker process."""
+    knowledge, query = shared[0]
+    return model_check_table(knowledge, query, model=part_model(part))
+
+
+def count_part(part):
+    """Counts the models of one part where knowledge is true, in a worker process."""
+    knowledge, = shared[0]
+    return count_models(knowledge, model=part_model(part))
@@ -0,0 +1,415 @@
+"""
+Entailment by satisfiability
+
+Converts logical sentences to conjunctive normal form with the Tseitin
+transformation and checks them with a conflict-driven clause learning
+SAT solver, so knowledge bases with too many symbols to enumerate every
+model can still be queried.
+
+Variables are positive integers and a literal is a variable or its
+negation, so a clause is a list of integers that must not all be false.
+"""
+
+import heapq
+
+from logic import Sentence, Symbol, Not, And, Or, Implication, Biconditional
+
+
+class CNF():
+    """Clauses equisatisfiable with the sentences added to them."""
+
+    def __init__(self):
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+
+        # Literal standing for each sentence already converted, keyed by id,
+        # along with the sentence itself so the id can't be reused
+        self.literals = {}
+        self.true = None
+
+    def variable(self, name=None):
+        """Returns the variable for a symbol name, or a new unnamed variable."""
+        if name is not None and name in self.variables:
+            return self.variables[name]
+        self.count += 1
+        if name is not None:
+            self.variables[name] = self.count
+        return self.count
+
+    def add(self, sentence):
+        """Adds clauses that are satisfiable only where the sentence is true."""
+        Sentence.validate(sentence)
+
+        # Conjunctions and disjunctions at the top need no new variables
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.clauses.append([self.literal(disjunct)
+                                 for disjunct in sentence.disjuncts])
+        else:
+            self.clauses.append([self.literal(sentence)])
+
+    def literal(self, sentence):
+        """Returns a literal that is true exactly where the sentence is true."""
+        entry = self.literals.get(id(sentence))
+        if entry is not None:
+            return entry[1]
+
+        if isinstance(sentence, Symbol):
+            literal = self.variable(sentence.name)
+        elif isinstance(sentence, Not):
+            literal = -self.literal(sentence.operand)
+        elif isinstance(sentence, And):
+            literal = self.conjunction(
+                [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            )
+        elif isinstance(sentence, Or):
+            literal = -self.conjunction(
+                [-self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            literal = -self.conjunction([
+                self.literal(sentence.antecedent),
+                -self.literal(sentence.consequent)
+            ])
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            literal = self.variable()
+            self.clauses.extend([
+                [-literal, -left, right], [-literal, left, -right],
+                [literal, left, right], [literal, -left, -right]
+            ])
+        else:
+            raise TypeError(f"cannot convert {sentence} to CNF")
+
+        self.literals[id(sentence)] = (sentence, literal)
+        return literal
+
+    def conjunction(self, literals):
+        """Returns a literal that is true exactly where all literals are true."""
+        if len(literals) == 1:
+            return literals[0]
+
+        # An empty conjunction is always true
+        if not literals:
+            if self.true is None:
+                self.true = self.variable()
+                self.clauses.append([self.true])
+            return self.true
+
+        literal = self.variable()
+        for other in literals:
+            self.clauses.append([-literal, other])
+        self.clauses.append([literal] + [-other for other in literals])
+        return literal
+
+
+class Solver():
+    """Conflict-driven clause learning SAT solver."""
+
+    def __init__(self, clauses=()):
+        # Value of each variable: 1 for true, -1 for false, 0 if unassigned
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+        self.increment = 1.0
+
+        # Assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.starts = []
+        self.head = 0
+
+        # Clauses watching each literal, which are looked at once it is false
+        self.watches = {}
+        self.order = []
+        self.unsatisfiable = False
+        self.model = None
+
+        for clause in clauses:
+            self.add_clause(clause)
+
+    def value_in_model(self, literal):
+        """Returns whether a literal is true in the last model found."""
+        if literal > 0:
+            return self.model[literal]
+        return not self.model[-literal]
+
+    def variable(self, variable):
+        """Makes room for every variable up to a given one."""
+        while len(self.values) <= variable:
+            self.values.append(0)
+            self.levels.append(0)
+            self.reasons.append(None)
+            self.activity.append(0.0)
+            self.phases.append(False)
+            self.watches[len(self.values) - 1] = []
+            self.watches[1 - len(self.values)] = []
+            heapq.heappush(self.order, (-0.0, len(self.values) - 1))
+
+    def value(self, literal):
+        """Returns 1 if a literal is true, -1 if it is false, 0 if unassigned."""
+        if literal > 0:
+            return self.values[literal]
+        return -self.values[-literal]
+
+    def add_clause(self, clause):
+        """Adds a clause, which can only be done between searches."""
+        for literal in clause:
+            self.variable(abs(literal))
+
+        # Drop literals that are already false, and clauses that are already true
+        literals = []
+        for literal in clause:
+            value = self.value(literal)
+            if value == 1 or -literal in literals:
+                return
+            if value == 0 and literal not in literals:
+                literals.append(literal)
+
+        if not literals:
+            self.unsatisfiable = True
+        elif len(literals) == 1:
+            self.assign(literals[0], None)
+        else:
+            self.watches[literals[0]].append(literals)
+            self.watches[literals[1]].append(literals)
+
+    def assign(self, literal, reason):
+        """Makes a literal true, because of a clause or as a decision."""
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = len(self.starts)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal that is the last one left unassigned in a
+        clause whose others are all false.
+
+        Returns a clause with every literal false, or None if there is none.
+        """
+        values = self.values
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watchers = self.watches[false]
+            kept = []
+            for i, clause in enumerate(watchers):
+
+                # Keep the false literal second, so the first can be implied
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                first_value = values[first] if first > 0 else -values[-first]
+                if first_value == 1:
+                    kept.append(clause)
+                    continue
+
+                # Watch another literal that isn't false, if there is one
+                for k in range(2, len(clause)):
+                    other = clause[k]
+                    if (values[other] if other > 0 else -values[-other]) != -1:
+                        clause[1], clause[k] = other, false
+                        self.watches[other].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value == -1:
+                        kept.extend(watchers[i + 1:])
+                        self.watches[false] = kept
+                        return clause
+                    self.assign(first, clause)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Resolves a conflicting clause with the reasons for its literals until
+        one literal is left from the current decision level.
+
+        Returns the learned clause, with that literal first, and the level to
+        jump back to, where the learned clause will imply it.
+        """
+        level = len(self.starts)
+        learned = [None]
+        seen = set()
+        pending = 0
+        clause = conflict
+        start = 0
+        index = len(self.trail) - 1
+        while True:
+
+            # Skip the literal a reason clause implied, which is being resolved on
+            for literal in clause[start:]:
+                variable = abs(literal)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(literal)
+
+            # Resolve on the most recent literal of this level in the clause
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[abs(literal)]
+            start = 1
+        learned[0] = -literal
+
+        # Jump back to the latest level of the other literals
+        if len(learned) == 1:
+            return learned, 0
+        latest = max(range(1, len(learned)),
+                     key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[latest] = learned[latest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        """Raises the priority of a variable involved in a conflict."""
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[other], other)
+                          for other in range(1, len(self.values))
+                          if not self.values[other]]
+            heapq.heapify(self.order)
+        elif not self.values[variable]:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def decide(self):
+        """Returns the unassigned variable with the highest priority, or None."""
+        while self.order:
+            activity, variable = heapq.heappop(self.order)
+            if not self.values[variable] and -activity == self.activity[variable]:
+                return variable
+        return None
+
+    def backtrack(self, level):
+        """Unassigns every literal above a decision level."""
+        if len(self.starts) <= level:
+            return
+        for literal in self.trail[self.starts[level]:]:
+            variable = abs(literal)
+            self.values[variable] = 0
+            self.reasons[variable] = None
+            self.phases[variable] = literal > 0
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[self.starts[level]:]
+        del self.starts[level:]
+        self.head = len(self.trail)
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses can all be satisfied with every literal
+        in assumptions true, and sets model to the value of each variable.
+        """
+        self.model = None
+        if self.unsatisfiable:
+            return False
+        for literal in assumptions:
+            self.variable(abs(literal))
+
+        conflicts = 0
+        restart = 100
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+
+                # A conflict without any decisions can never be avoided
+                if not self.starts:
+                    self.unsatisfiable = True
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) > 1:
+                    self.watches[learned[0]].append(learned)
+                    self.watches[learned[1]].append(learned)
+                self.assign(learned[0], learned)
+                self.increment /= 0.95
+
+                # Start over now and then, keeping what was learned
+                conflicts += 1
+                if conflicts == restart:
+                    self.backtrack(0)
+                    conflicts = 0
+                    restart = restart * 3 // 2
+                continue
+
+            # Assumptions are decided first, one level each
+            level = len(self.starts)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value == -1:
+                    self.backtrack(0)
+                    return False
+                self.starts.append(len(self.trail))
+                if value == 0:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                self.model = [value == 1 for value in self.values]
+                self.backtrack(0)
+                return True
+            self.starts.append(len(self.trail))
+            self.assign(variable if self.phases[variable] else -variable, None)
+
+
+def entails(knowledge, query):
+    """Checks if knowledge base entails query, by finding no model of knowledge ∧ ¬query."""
+    cnf = CNF()
+    cnf.add(knowledge)
+    literal = cnf.literal(query)
+    return not Solver(cnf.clauses).solve([-literal])
+
+
+def entails_all(knowledge, queries):
+    """
+    Checks which of many queries knowledge base entails, converting it
+    once and reusing one solver. Returns a list of bools in the order of queries.
+    """
+    cnf = CNF()
+    cnf.add(knowledge)
+    literals = [cnf.literal(query) for query in queries]
+    solver = Solver(cnf.clauses)
+    solver.variable(cnf.count)
+
+    entailed = [None] * len(queries)
+    for i, literal in enumerate(literals):
+        if entailed[i] is not None:
+            continue
+        if solver.solve([-literal]):
+
+            # The model found also rules out every other query false in it
+            for j in range(i, len(literals)):
+                if not solver.value_in_model(literals[j]):
+                    entailed[j] = False
+        else:
+            entailed[i] = True
+    return entailed
+
+
+def satisfiable(sentence):
+    """Returns a model of the sentence's symbols where it is true, or None if there is none."""
+    cnf = CNF()
+    cnf.add(sentence)
+    solver = Solver(cnf.clauses)
+    if not solver.solve():
+        return None
+    return {name: solver.model[variable] for name, variable in cnf.variables.items()}